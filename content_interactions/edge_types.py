@@ -0,0 +1,111 @@
+# coding=utf-8
+import logging
+import threading
+import time
+from django.core.cache import cache
+from . import (
+    LIKE, LIKED_BY, RATE, RATED_BY, FAVORITE, FAVORITE_OF, DENOUNCE, DENOUNCED_BY,
+    AUTHOR, AUTHORED_BY, TARGET, TARGETED_BY
+)
+
+logger = logging.getLogger(__name__)
+
+EDGE_TYPE_NAMES = (
+    LIKE, LIKED_BY, RATE, RATED_BY, FAVORITE, FAVORITE_OF, DENOUNCE, DENOUNCED_BY,
+    AUTHOR, AUTHORED_BY, TARGET, TARGETED_BY
+)
+
+EDGE_TYPES_CACHE_KEY = 'CONTENT_INTERACTIONS_EDGE_TYPES'
+EDGE_TYPES_LOCK_KEY = 'CONTENT_INTERACTIONS_EDGE_TYPES_LOCK'
+
+
+class EdgeTypeRegistry(object):
+    """
+    Process-local registry of the content interaction edge types.
+
+    All the edge types are loaded together the first time one of them is requested, and then served
+    from memory. On a miss, only one thread per process (and, through a cache lock, one process at a
+    time) goes to the database; the rest wait for the shared cache to be filled.
+
+    Missing edge types are remembered too, for ``missing_timeout`` seconds, so looking them up doesn't
+    query the database every time.
+    """
+    lock_timeout = 10
+    wait_timeout = 1
+    wait_interval = 0.05
+    missing_timeout = 60
+
+    def __init__(self, names=EDGE_TYPE_NAMES):
+        self.names = tuple(names)
+        self._edge_types = {}
+        self._missing_until = 0
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        edge_type = self._edge_types.get(name)
+        if edge_type is None and time.time() >= self._missing_until:
+            edge_type = self._load(name)
+        return edge_type
+
+    def invalidate(self, shared=True):
+        """
+        Drops the loaded edge types, so they are read again on next access. If ``shared`` is True the
+        copy stored in the cache is dropped too.
+        """
+        with self._lock:
+            self._edge_types = {}
+            self._missing_until = 0
+        if shared:
+            cache.delete(EDGE_TYPES_CACHE_KEY)
+
+    def _load(self, name):
+        with self._lock:
+            edge_type = self._edge_types.get(name)
+            if edge_type is not None or time.time() < self._missing_until:
+                return edge_type
+            edge_types = cache.get(EDGE_TYPES_CACHE_KEY)
+            if edge_types is None:
+                edge_types = self._load_from_db()
+            self._edge_types = dict(edge_types)
+            if len(edge_types) == len(self.names):
+                # any other name is not an edge type of the registry
+                self._missing_until = float('inf')
+            else:
+                self._missing_until = time.time() + self.missing_timeout
+            edge_type = self._edge_types.get(name)
+            if edge_type is None:
+                logger.error(u"The edge type '%s' does not exist." % name)
+            return edge_type
+
+    def _load_from_db(self):
+        locked = cache.add(EDGE_TYPES_LOCK_KEY, True, self.lock_timeout)
+        try:
+            if not locked:
+                edge_types = self._wait_for_cache()
+                if edge_types is not None:
+                    return edge_types
+            from social_graph.models import EdgeType
+            edge_types = dict(
+                (edge_type.name, edge_type) for edge_type in EdgeType.objects.filter(name__in=self.names)
+            )
+            if len(edge_types) == len(self.names):
+                cache.set(EDGE_TYPES_CACHE_KEY, edge_types)
+            else:
+                # the missing ones are not looked up again until they are created or the timeout expires
+                cache.set(EDGE_TYPES_CACHE_KEY, edge_types, self.missing_timeout)
+            return edge_types
+        finally:
+            if locked:
+                cache.delete(EDGE_TYPES_LOCK_KEY)
+
+    def _wait_for_cache(self):
+        deadline = time.time() + self.wait_timeout
+        while time.time() < deadline:
+            time.sleep(self.wait_interval)
+            edge_types = cache.get(EDGE_TYPES_CACHE_KEY)
+            if edge_types is not None:
+                return edge_types
+        return None
+
+
+registry = EdgeTypeRegistry()
@@ -0,0 +1,201 @@
+# coding=utf-8
+"""
+Queries over the social graph edge storage, for the cases the Graph api can only serve one node or
+one edge at a time.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.utils.encoding import force_text
+
+
+def edges_from(node, edge_type, site=None):
+    """
+    QuerySet of the edges of the given type (or types, if a list is passed) that start at ``node``.
+    """
+    from social_graph.models import Edge
+    result = Edge.objects.filter(
+        fromNode_type=ContentType.objects.get_for_model(node), fromNode_pk=force_text(node.pk)
+    )
+    if isinstance(edge_type, (list, tuple, set)):
+        result = result.filter(type__in=edge_type)
+    else:
+        result = result.filter(type=edge_type)
+    if site is not None:
+        result = result.filter(site=site)
+    return result
+
+
+INTEGER_FIELDS = ('AutoField', 'IntegerField', 'BigIntegerField', 'PositiveIntegerField', 'SmallIntegerField',
+                  'PositiveSmallIntegerField')
+
+
+def _cast(column, to_integer):
+    if connection.vendor == 'mysql':
+        return 'CAST(%s AS %s)' % (column, 'SIGNED' if to_integer else 'CHAR')
+    return 'CAST(%s AS %s)' % (column, 'INTEGER' if to_integer else 'VARCHAR')
+
+
+def edge_targets(queryset, node, edge_type, site=None, before=None):
+    """
+    Filters ``queryset`` down to the objects targeted by edges of the given type starting at ``node``,
+    newest edge first. The edges are filtered by content type in the database and joined with the
+    objects through a subquery, so nothing is loaded until the result is evaluated.
+
+    Each object gets the time of its edge as ``edge_time``. The objects are ordered by (edge time, pk),
+    so passing the (``edge_time``, pk) of the last one as ``before`` returns the next page, even when
+    several edges share the same time.
+    """
+    from social_graph.models import Edge
+    model = queryset.model
+    qn = connection.ops.quote_name
+
+    def column(name):
+        return 'e.%s' % qn(Edge._meta.get_field(name).column)
+
+    conditions = [
+        '%s = %%s' % column('fromNode_type'),
+        '%s = %%s' % column('fromNode_pk'),
+        '%s = %%s' % column('type'),
+        '%s = %%s' % column('toNode_type'),
+    ]
+    params = [
+        ContentType.objects.get_for_model(node).pk,
+        force_text(node.pk),
+        edge_type.pk,
+        ContentType.objects.get_for_model(model).pk,
+    ]
+    if site is not None:
+        conditions.append('%s = %%s' % column('site'))
+        params.append(site.pk)
+
+    edge_table = '%s e' % qn(Edge._meta.db_table)
+    pk_column = '%s.%s' % (qn(model._meta.db_table), qn(model._meta.pk.column))
+    integer_pk = model._meta.pk.get_internal_type() in INTEGER_FIELDS
+    target_pk = _cast(column('toNode_pk'), True) if integer_pk else column('toNode_pk')
+    target_conditions, target_params = list(conditions), list(params)
+    if before is not None:
+        before_time, before_pk = before
+        target_conditions.append('(%s < %%s OR (%s = %%s AND %s < %%s))' % (
+            column('time'), column('time'), target_pk
+        ))
+        target_params.extend([before_time, before_time, before_pk if integer_pk else force_text(before_pk)])
+    target_pks = 'SELECT %s FROM %s WHERE %s' % (target_pk, edge_table, ' AND '.join(target_conditions))
+    edge_time = 'SELECT MAX(%s) FROM %s WHERE %s AND %s = %s' % (
+        column('time'),
+        edge_table,
+        ' AND '.join(conditions),
+        column('toNode_pk'),
+        _cast(pk_column, False) if integer_pk else pk_column
+    )
+    return queryset.extra(
+        select={'edge_time': edge_time},
+        select_params=params,
+        where=['%s IN (%s)' % (pk_column, target_pks)],
+        params=target_params,
+        order_by=['-edge_time', '-pk']
+    )
+
+
+def iter_edge_nodes(node, edge_type, site=None, offset=0, limit=None, chunk_size=None, resolve=True):
+    """
+    Walks the edges of the given type that start at ``node``, newest first, reading ``chunk_size``
+    edges at a time, and yields the nodes they point to. Only the first chunk is read by offset; the
+    next ones continue from the last edge read, so deep pages cost as much as the first one.
+
+    If ``resolve`` is False the stored node pks are yielded instead, and no objects are loaded.
+    Otherwise the nodes of each chunk are loaded together, with one ``in_bulk`` per content type.
+    """
+    from django.conf import settings
+    chunk_size = chunk_size or settings.CONTENT_INTERACTIONS_EDGE_CHUNK_SIZE
+    edges = edges_from(node, edge_type, site).order_by('-time', '-pk')
+    remaining = limit
+    last = None
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        if last is None:
+            chunk = edges[offset:offset + size]
+        else:
+            chunk = edges.filter(Q(time__lt=last[1]) | Q(time=last[1], pk__lt=last[0]))[:size]
+        chunk = list(chunk.values_list('pk', 'time', 'toNode_type', 'toNode_pk'))
+        if not chunk:
+            return
+        if resolve:
+            nodes = _resolve_nodes([(node_type, node_pk) for pk, time, node_type, node_pk in chunk])
+            for pk, time, node_type, node_pk in chunk:
+                if (node_type, node_pk) in nodes:
+                    yield nodes[(node_type, node_pk)]
+        else:
+            for pk, time, node_type, node_pk in chunk:
+                yield node_pk
+        if len(chunk) < size:
+            return
+        last = chunk[-1]
+        if remaining is not None:
+            remaining -= len(chunk)
+
+
+def _resolve_nodes(keys):
+    pks_by_type = {}
+    for node_type, node_pk in keys:
+        pks_by_type.setdefault(node_type, []).append(node_pk)
+    nodes = {}
+    for node_type, pks in pks_by_type.items():
+        model = ContentType.objects.get_for_id(node_type).model_class()
+        for pk, obj in model._default_manager.in_bulk(pks).items():
+            nodes[(node_type, force_text(pk))] = obj
+    return nodes
+
+
+def node_key(node):
+    return ContentType.objects.get_for_model(node).pk, force_text(node.pk)
+
+
+def existing_edges(pairs, edge_type):
+    """
+    Returns a dict that maps each (from node key, to node key) in ``pairs`` (a list of (from node, to
+    node) tuples) for which an edge of the given type exists, to the attributes of that edge. The edges
+    are read with one query per content types and site of the pairs.
+    """
+    from social_graph.models import Edge
+    groups = {}
+    for from_node, to_node in pairs:
+        from_type, from_pk = node_key(from_node)
+        to_type, to_pk = node_key(to_node)
+        group = groups.setdefault((from_type, to_type, to_node.get_site().pk), (set(), set()))
+        group[0].add(from_pk)
+        group[1].add(to_pk)
+    result = {}
+    for (from_type, to_type, site), (from_pks, to_pks) in groups.items():
+        edges = Edge.objects.filter(
+            type=edge_type,
+            site=site,
+            fromNode_type=from_type,
+            fromNode_pk__in=list(from_pks),
+            toNode_type=to_type,
+            toNode_pk__in=list(to_pks),
+        ).only('fromNode_pk', 'toNode_pk', 'attributes')
+        for edge in edges:
+            result[((from_type, edge.fromNode_pk), (to_type, edge.toNode_pk))] = edge.attributes
+    return result
+
+
+def find_edges(edge_type, from_type, from_pks, to_type, to_pks, sites=None):
+    """
+    Returns, read with one query, the (from pk, to pk, site pk) of the edges of the given type that go
+    from any of the ``from_pks`` nodes of content type ``from_type`` to any of the ``to_pks`` nodes of
+    content type ``to_type``, on the given sites (any site if None). The pks are returned as text.
+    """
+    from social_graph.models import Edge
+    if not from_pks or not to_pks:
+        return []
+    edges = Edge.objects.filter(
+        type=edge_type,
+        fromNode_type=from_type,
+        fromNode_pk__in=[force_text(pk) for pk in from_pks],
+        toNode_type=to_type,
+        toNode_pk__in=[force_text(pk) for pk in to_pks],
+    )
+    if sites is not None:
+        edges = edges.filter(site__in=list(sites))
+    return list(edges.values_list('fromNode_pk', 'toNode_pk', 'site'))
@@ -4,7 +4,6 @@ from django import forms
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.sites.models import Site
 from django.core.exceptions import ValidationError, ImproperlyConfigured
 from django.utils.crypto import salted_hmac, constant_time_compare
 from django.utils.encoding import force_str
@@ -12,6 +11,8 @@ from django.forms.util import ErrorList, ErrorDict
 from django.utils.translation import ugettext_lazy as _, ungettext, ugettext
 from django.utils.text import get_text_list
 from models import Comment
+from profanities import find_profanities
+from sites import get_current_site
 
 
 class ShareForm(forms.Form):
@@ -159,12 +160,12 @@ class CommentForm(forms.ModelForm):
     def clean_comment(self):
         """
         If COMMENTS_ALLOW_PROFANITIES is False, check that the comment doesn't
-        contain anything in PROFANITIES_LIST.
+        contain anything in PROFANITIES_LIST (see ``profanities.ProfanityMatcher``).
         """
         comment = self.cleaned_data["comment"]
         if (not getattr(settings, 'COMMENTS_ALLOW_PROFANITIES', False) and
                 getattr(settings, 'PROFANITIES_LIST', False)):
-            bad_words = [w for w in settings.PROFANITIES_LIST if w in comment.lower()]
+            bad_words = find_profanities(comment)
             if bad_words:
                 raise forms.ValidationError(ungettext(
                     "Watch your mouth! The word %s is not allowed here.",
@@ -296,7 +297,7 @@ try:
             social_networks = self.cleaned_data.get('social_networks', None)
             content_object = content_object or self.content_object
             if comment and comment != "" and social_networks and social_networks and content_object:
-                site_pk = Site.objects.get_current().pk
+                site_pk = get_current_site().pk
                 content_type = self.cleaned_data['content_type'] or ContentType.objects.get_for_model(content_object)
 
                 if (CONTENT_CLASS[self.cleaned_data['provider_type']] == ActionMessageProvider):
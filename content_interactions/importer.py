@@ -0,0 +1,236 @@
+# coding=utf-8
+"""
+Bulk import of comments, e.g. from a legacy system.
+
+Each record is a dict with the keys of ``RECORD_FIELDS``. The comments keep the ``id`` of their records
+as pk, so answers can refer to their parents by ``answer_to``; parents must come before their answers.
+Comments that already exist are skipped, so an interrupted import can be run again from any point.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_text
+from social_graph import Graph
+from mixins import author_edge, target_edge, commenting_users_cache_key, bump_comment_thread_version
+from utils import batches, send_by_model
+from models import Comment
+from signals import items_commented
+
+graph = Graph()
+
+RECORD_FIELDS = (
+    'id', 'content_type', 'object_pk', 'site', 'user', 'user_name', 'user_email', 'user_url', 'comment',
+    'answer_to', 'submit_date', 'ip_address', 'is_public'
+)
+
+
+class CommentImportError(ValueError):
+    pass
+
+
+class CommentImporter(object):
+    """
+    Imports comment records in chunks of ``chunk_size`` (CONTENT_INTERACTIONS_BULK_BATCH_SIZE by
+    default). For each chunk, the users, parent comments, content objects and sites are loaded with one
+    query per model, the comments are inserted with ``bulk_create``, and their author and target edges
+    are written, all in one transaction. Then one ``items_commented`` signal per model is sent, with the
+    number of comments of each object, instead of an ``item_commented`` signal per comment.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or settings.CONTENT_INTERACTIONS_BULK_BATCH_SIZE
+        self.levels = {}
+        self.content_types = {}
+
+    def import_records(self, records):
+        """
+        Imports the passed records, and yields the number of records read and the number of comments
+        created for each chunk.
+        """
+        try:
+            for chunk in batches(records, self.chunk_size):
+                yield len(chunk), len(self.import_chunk(chunk))
+        finally:
+            self.reset_sequence()
+
+    def import_chunk(self, records):
+        existing = set(Comment._base_manager.filter(
+            pk__in=[int(record['id']) for record in records]
+        ).values_list('pk', flat=True))
+        comments = [self.build(record) for record in records if int(record['id']) not in existing]
+        if not comments:
+            return comments
+
+        users = get_user_model()._default_manager.in_bulk(
+            set(comment.user_id for comment in comments if comment.user_id)
+        )
+        sites = Site.objects.in_bulk(set(comment.site_id for comment in comments))
+        content_objects = self.content_objects(comments)
+        self.load_levels(comments)
+        for comment in comments:
+            user = users.get(comment.user_id)
+            if comment.user_id and user is None:
+                raise CommentImportError(
+                    u"The user %s of the comment %s does not exist." % (comment.user_id, comment.pk)
+                )
+            if user is not None:
+                comment.user = user
+                comment.user_name = comment.user_name or user.get_full_name() or user.get_username()
+                comment.user_email = comment.user_email or user.email
+            if comment.site_id not in sites:
+                raise CommentImportError(
+                    u"The site %s of the comment %s does not exist." % (comment.site_id, comment.pk)
+                )
+            comment.site = sites[comment.site_id]
+            if comment.answer_to_id and comment.answer_to_id not in self.levels:
+                raise CommentImportError(
+                    u"The comment %s must be imported before its answer %s." % (comment.answer_to_id, comment.pk)
+                )
+            comment.level = self.levels[comment.answer_to_id] + 1 if comment.answer_to_id else 1
+            self.levels[comment.pk] = comment.level
+
+        with transaction.atomic():
+            submit_dates = dict((comment.pk, comment.submit_date) for comment in comments)
+            Comment.objects.bulk_create(comments)
+            self.restore_submit_dates(submit_dates)
+            for comment in comments:
+                comment.submit_date = submit_dates[comment.pk]
+            for comment in comments:
+                content_object = content_objects[(comment.content_type_id, comment.object_pk)]
+                if comment.user_id:
+                    graph.edge(comment.user, comment, author_edge(), comment.site, {})
+                graph.edge(comment, content_object, target_edge(), comment.site, {})
+
+        counts = {}
+        for comment in comments:
+            content_object = content_objects[(comment.content_type_id, comment.object_pk)]
+            counts[content_object] = counts.get(content_object, 0) + 1
+        cache.delete_many([
+            commenting_users_cache_key(content_type_id, object_pk) for content_type_id, object_pk in content_objects
+        ])
+        for content_type_id, object_pk, site_id in set(
+                (comment.content_type_id, comment.object_pk, comment.site_id) for comment in comments):
+            bump_comment_thread_version(content_type_id, object_pk, site_id)
+        send_by_model(items_commented, counts)
+        return comments
+
+    def restore_submit_dates(self, submit_dates):
+        """
+        Writes back the imported {pk: submit date} dates, replaced on insert by the 'auto_now_add' date,
+        with one UPDATE.
+        """
+        qn = connection.ops.quote_name
+        field = Comment._meta.get_field('submit_date')
+        cases, params = [], []
+        for pk, submit_date in submit_dates.items():
+            cases.append('WHEN %s THEN %s')
+            params.extend([pk, field.get_db_prep_save(submit_date, connection)])
+        params.extend(submit_dates.keys())
+        connection.cursor().execute('UPDATE %s SET %s = CASE %s %s END WHERE %s IN (%s)' % (
+            qn(Comment._meta.db_table),
+            qn(field.column),
+            qn(Comment._meta.pk.column),
+            ' '.join(cases),
+            qn(Comment._meta.pk.column),
+            ', '.join(['%s'] * len(submit_dates))
+        ), params)
+
+    def build(self, record):
+        content_type = self.get_content_type(record['content_type'])
+        submit_date = record.get('submit_date') or timezone.now()
+        if not hasattr(submit_date, 'tzinfo'):
+            submit_date = parse_datetime(force_text(submit_date))
+            if submit_date is None:
+                raise CommentImportError(u"Invalid submit date: %r" % record['submit_date'])
+        if settings.USE_TZ and timezone.is_naive(submit_date):
+            submit_date = timezone.make_aware(submit_date, timezone.get_default_timezone())
+        object_pk = force_text(record['object_pk'])
+        is_public = record.get('is_public', True)
+        if not isinstance(is_public, bool):
+            is_public = force_text(is_public).lower() not in ('', '0', 'false', 'no')
+        return Comment(
+            pk=int(record['id']),
+            content_type_id=content_type.pk,
+            object_pk=object_pk,
+            object_id=int(object_pk) if object_pk.isdigit() else None,
+            site_id=int(record.get('site') or settings.SITE_ID),
+            user_id=int(record['user']) if record.get('user') else None,
+            user_name=record.get('user_name') or '',
+            user_email=record.get('user_email') or '',
+            user_url=record.get('user_url') or '',
+            comment=record['comment'],
+            answer_to_id=int(record['answer_to']) if record.get('answer_to') else None,
+            submit_date=submit_date,
+            ip_address=record.get('ip_address') or None,
+            is_public=is_public,
+        )
+
+    def get_content_type(self, value):
+        """
+        Returns the content type given by its pk or by its natural key, as 'app_label.model'.
+        """
+        content_type = self.content_types.get(value)
+        if content_type is None:
+            try:
+                if force_text(value).isdigit():
+                    content_type = ContentType.objects.get_for_id(int(value))
+                else:
+                    app_label, model = force_text(value).split('.')
+                    content_type = ContentType.objects.get_by_natural_key(app_label, model)
+            except (ValueError, ContentType.DoesNotExist):
+                raise CommentImportError(u"Invalid content type: %r" % value)
+            self.content_types[value] = content_type
+        return content_type
+
+    def content_objects(self, comments):
+        pks_by_type = {}
+        for comment in comments:
+            pks_by_type.setdefault(comment.content_type_id, set()).add(comment.object_pk)
+        result = {}
+        for content_type_id, pks in pks_by_type.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            for pk, obj in model._default_manager.in_bulk(list(pks)).items():
+                result[(content_type_id, force_text(pk))] = obj
+        for comment in comments:
+            if (comment.content_type_id, comment.object_pk) not in result:
+                raise CommentImportError(u"The object of the comment %s does not exist." % comment.pk)
+        return result
+
+    def load_levels(self, comments):
+        """
+        Loads the levels of the parents of the passed comments that were not imported in this run.
+        """
+        pks = set(comment.pk for comment in comments)
+        missing = set(
+            comment.answer_to_id for comment in comments
+            if comment.answer_to_id and comment.answer_to_id not in self.levels and comment.answer_to_id not in pks
+        )
+        if missing:
+            self.levels.update(Comment._base_manager.filter(pk__in=missing).values_list('pk', 'level'))
+        for pk in missing:
+            if pk not in self.levels:
+                raise CommentImportError(u"The comment %s does not exist." % pk)
+            self.levels[pk] = self.levels[pk] or 1
+
+    def reset_sequence(self):
+        """
+        Moves the pk sequence of the comments past the imported ids, as ``loaddata`` does.
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), [Comment])
+        if statements:
+            cursor = connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def import_comments(records, chunk_size=None):
+    """
+    Imports the passed comment records (see ``CommentImporter``). Returns the number of comments created.
+    """
+    return sum(created for read, created in CommentImporter(chunk_size).import_records(records))
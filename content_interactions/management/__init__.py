@@ -1,11 +1,11 @@
 # coding=utf-8
 from django.db.models.signals import post_syncdb
-import models as content_interactions_app
+from content_interactions import models as content_interactions_app
 
 
 def create_edge_types(**kwargs):
     from social_graph.models import EdgeType, EdgeTypeAssociation
-    from . import (
+    from .. import (
         LIKE,
         LIKE_STR,
         LIKED_BY,
@@ -84,5 +84,8 @@ def create_edge_types(**kwargs):
     })
     EdgeTypeAssociation.objects.get_or_create(direct=target, inverse=targeted_by)
 
+    from ..edge_types import registry
+    registry.invalidate()
+
 
 post_syncdb.connect(create_edge_types, sender=content_interactions_app)
\ No newline at end of file
@@ -0,0 +1,87 @@
+# coding=utf-8
+import csv
+import io
+import json
+import os
+from itertools import islice
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import six
+from content_interactions.importer import CommentImporter, CommentImportError, RECORD_FIELDS
+
+
+class Command(BaseCommand):
+    args = '<file>'
+    help = (
+        "Imports comments from a NDJSON (one JSON object per line) or CSV (with a header row) file. The "
+        "records have the fields: %s. The number of records imported is saved to a checkpoint file after "
+        "each chunk, and the next run resumes from there." % ', '.join(RECORD_FIELDS)
+    )
+    option_list = BaseCommand.option_list + (
+        make_option('--format', dest='format', choices=('ndjson', 'csv'), default=None,
+                    help="The format of the file, 'ndjson' or 'csv'. Guessed from the file extension by default."),
+        make_option('--chunk-size', dest='chunk_size', type='int', default=None,
+                    help="The number of comments imported per transaction."),
+        make_option('--checkpoint', dest='checkpoint', default=None,
+                    help="The checkpoint file. '<file>.checkpoint' by default."),
+        make_option('--restart', dest='restart', action='store_true', default=False,
+                    help="Ignores the checkpoint and imports the file from the start."),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("A file to import is required.")
+        path = args[0]
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        checkpoint = options['checkpoint'] or '%s.checkpoint' % path
+        start = 0 if options['restart'] else self.read_checkpoint(checkpoint)
+        if start:
+            self.stdout.write("Resuming after %s records." % start)
+
+        importer = CommentImporter(options['chunk_size'])
+        position, total = start, 0
+        with self.open_source(path, file_format) as source:
+            records = self.read_csv(source) if file_format == 'csv' else self.read_ndjson(source)
+            try:
+                for read, created in importer.import_records(islice(records, start, None)):
+                    position += read
+                    total += created
+                    self.write_checkpoint(checkpoint, position)
+                    if int(options['verbosity']) > 1:
+                        self.stdout.write("%s records read, %s comments created." % (position, total))
+            except CommentImportError as e:
+                raise CommandError("Error importing the records after the record %s: %s" % (position, e))
+        self.stdout.write("%s comments created." % total)
+
+    def open_source(self, path, file_format):
+        if file_format == 'csv' and six.PY2:
+            # the python 2 csv module reads bytes only
+            return open(path, 'rb')
+        return io.open(path, encoding='utf-8', newline='' if file_format == 'csv' else None)
+
+    def read_ndjson(self, source):
+        for line in source:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+    def read_csv(self, source):
+        for row in csv.DictReader(source):
+            if six.PY2:
+                row = dict(
+                    (key.decode('utf-8'), value.decode('utf-8') if value is not None else None)
+                    for key, value in row.items()
+                )
+            yield row
+
+    def read_checkpoint(self, checkpoint):
+        if not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as f:
+            return int(f.read().strip() or 0)
+
+    def write_checkpoint(self, checkpoint, position):
+        temporary = '%s.tmp' % checkpoint
+        with open(temporary, 'w') as f:
+            f.write('%s' % position)
+        os.rename(temporary, checkpoint)
@@ -0,0 +1,69 @@
+# coding=utf-8
+from optparse import make_option
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from content_interactions.mixins import comment_count_cache_key
+from content_interactions.models import Comment
+
+
+class Command(BaseCommand):
+    help = (
+        "Counts the comments of each commented object and repairs the denormalized comment counters: the "
+        "'comments' counter of the stats, when content_interactions_stats is installed, and the cached counts."
+    )
+    option_list = BaseCommand.option_list + (
+        make_option('--content-type', dest='content_type', default=None,
+                    help="Only reconciles the objects of this content type, as 'app_label.model'."),
+        make_option('--dry-run', dest='dry_run', action='store_true', default=False,
+                    help="Reports the counters that drifted, without repairing them."),
+    )
+
+    def handle(self, *args, **options):
+        content_type = None
+        comments = Comment.objects.all()
+        if options['content_type']:
+            try:
+                app_label, model = options['content_type'].split('.')
+                content_type = ContentType.objects.get_by_natural_key(app_label, model)
+            except (ValueError, ContentType.DoesNotExist):
+                raise CommandError("Invalid content type: %s" % options['content_type'])
+            comments = comments.filter(content_type=content_type)
+
+        counts = {}
+        for content_type_pk, object_pk, count in comments.values_list(
+                'content_type', 'object_pk').annotate(count=Count('pk')).order_by().iterator():
+            counts[(content_type_pk, object_pk)] = count
+
+        drifted = self.reconcile_stats(counts, content_type, options) if self.stats_installed() else 0
+        if not options['dry_run']:
+            # the cached counts are just dropped, they are counted again on next access
+            cache.delete_many([comment_count_cache_key(*key) for key in counts])
+        self.stdout.write("%s objects counted, %s counters %s." % (
+            len(counts), drifted, 'drifted' if options['dry_run'] else 'repaired'
+        ))
+
+    def stats_installed(self):
+        if 'content_interactions_stats' not in settings.INSTALLED_APPS:
+            return False
+        from content_interactions_stats.models import Stats
+        return 'comments' in Stats._meta.get_all_field_names()
+
+    def reconcile_stats(self, counts, content_type, options):
+        from content_interactions_stats.models import Stats
+        stats = Stats.objects.all()
+        if content_type is not None:
+            stats = stats.filter(content_type=content_type)
+        drifted = 0
+        for pk, content_type_pk, object_pk, current in stats.values_list(
+                'pk', 'content_type', 'object_pk', 'comments').iterator():
+            count = counts.get((content_type_pk, str(object_pk)), 0)
+            if count != current:
+                drifted += 1
+                if int(options['verbosity']) > 1:
+                    self.stdout.write("%s.%s: counter %s, %s comments." % (content_type_pk, object_pk, current, count))
+                if not options['dry_run']:
+                    Stats.objects.filter(pk=pk).update(comments=count)
+        return drifted
@@ -3,7 +3,9 @@ from django.conf import settings
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.managers import CurrentSiteManager
+from django.db.models import Q
 from django.utils.encoding import force_text
+from utils import encode_cursor, decode_cursor
 
 
 class CommentQuerySet(models.query.QuerySet):
@@ -22,9 +24,78 @@ class CommentQuerySet(models.query.QuerySet):
         content_type = ContentType.objects.get_for_model(model)
         result = self.filter(content_type=content_type)
         if isinstance(model, models.Model):
-            result = result.filter(object_pk=force_text(model._get_pk_val()))
+            object_pk = force_text(model._get_pk_val())
+            if object_pk.isdigit():
+                # served by the (content_type, object_id, site, is_removed, answer_to, submit_date) index
+                result = result.filter(object_id=int(object_pk))
+            else:
+                result = result.filter(object_pk=object_pk)
         return result
 
+    def tree(self, content_object=None, max_level=None):
+        """
+        Loads the comments of this QuerySet along with their users in a single query, and returns the
+        first level ones. Each comment gets its answers, down to ``max_level`` (COMMENT_MAX_LEVELS by
+        default), as ``thread_answers``, and its parent comment and the passed ``content_object`` are set
+        on it, so none of them is queried again.
+        """
+        return self._build_tree(list(self.select_related('user', 'content_type')), content_object, max_level)
+
+    def after(self, cursor):
+        """
+        The comments that come after the (submit_date, pk) position given by ``cursor``, in that order.
+        """
+        result = self.order_by('submit_date', 'pk')
+        if cursor is None:
+            return result
+        submit_date, pk = decode_cursor(cursor)
+        return result.filter(Q(submit_date__gt=submit_date) | Q(submit_date=submit_date, pk__gt=pk))
+
+    def tree_page(self, cursor=None, size=None, content_object=None, max_level=None):
+        """
+        Like ``tree``, but only for the ``size`` (COMMENT_PAGE_SIZE by default) first level comments that
+        come after ``cursor``. The first level comments are read with one query, which continues from
+        the cursor instead of skipping the previous pages, and their answers with one more query per
+        level.
+
+        Returns the page and the cursor of the next one, or None if this is the last page.
+        """
+        size = size or settings.COMMENT_PAGE_SIZE
+        max_level = max_level or settings.COMMENT_MAX_LEVELS
+        roots = list(self.first_level().after(cursor).select_related('user', 'content_type')[:size + 1])
+        next_cursor = None
+        if len(roots) > size:
+            roots = roots[:size]
+            next_cursor = encode_cursor(roots[-1].submit_date, roots[-1].pk)
+        comments = list(roots)
+        parents = [comment.pk for comment in roots]
+        for level in range(max_level):
+            if not parents:
+                break
+            answers = list(self.filter(answer_to__in=parents).select_related('user', 'content_type'))
+            comments.extend(answers)
+            parents = [comment.pk for comment in answers]
+        return self._build_tree(comments, content_object, max_level), next_cursor
+
+    def _build_tree(self, comments, content_object, max_level):
+        max_level = max_level or settings.COMMENT_MAX_LEVELS
+        answer_to_cache = self.model._meta.get_field('answer_to').get_cache_name()
+        by_pk = dict((comment.pk, comment) for comment in comments)
+        roots = []
+        for comment in comments:
+            comment.thread_answers = []
+            if content_object is not None:
+                comment._content_object_cache = content_object
+        for comment in comments:
+            parent = by_pk.get(comment.answer_to_id)
+            if comment.answer_to_id is None:
+                roots.append(comment)
+            elif parent is not None:
+                setattr(comment, answer_to_cache, parent)
+                if (parent.level or 1) <= max_level:
+                    parent.thread_answers.append(comment)
+        return roots
+
 
 class CommentManagerMixin(object):
 
@@ -34,6 +105,12 @@ class CommentManagerMixin(object):
     def first_level(self):
         return self.get_queryset().first_level()
 
+    def tree(self, content_object=None, max_level=None):
+        return self.get_queryset().tree(content_object, max_level)
+
+    def tree_page(self, cursor=None, size=None, content_object=None, max_level=None):
+        return self.get_queryset().tree_page(cursor, size, content_object, max_level)
+
 
 class CommentManager(CommentManagerMixin, models.Manager):
 
@@ -0,0 +1,88 @@
+# coding=utf-8
+"""
+Request scoped memo of interaction lookups.
+
+While a memo is active (see ``interaction_memo`` and ``middleware.InteractionMemoMiddleware``) the
+interaction mixins remember the counters and edges they read from the graph, keyed by site, object,
+edge type and user, and forget everything about an object as soon as one of its interactions is
+written. Outside a memo every lookup goes to the graph, as usual.
+"""
+import threading
+from contextlib import contextmanager
+from django.contrib.contenttypes.models import ContentType
+from django.utils.encoding import force_text
+
+_local = threading.local()
+
+MISSING = object()
+
+
+class InteractionMemo(object):
+
+    def __init__(self):
+        self._values = {}
+
+    def get(self, obj_key, key):
+        return self._values.get(obj_key, {}).get(key, MISSING)
+
+    def set(self, obj_key, key, value):
+        self._values.setdefault(obj_key, {})[key] = value
+
+    def invalidate(self, obj_key=None):
+        if obj_key is None:
+            self._values = {}
+        else:
+            self._values.pop(obj_key, None)
+
+
+def active_memo():
+    return getattr(_local, 'memo', None)
+
+
+def activate():
+    previous = active_memo()
+    _local.memo = InteractionMemo()
+    return previous
+
+
+def deactivate(previous=None):
+    _local.memo = previous
+
+
+@contextmanager
+def interaction_memo():
+    """
+    Activates a new memo for the enclosed block, and restores the previous one on exit.
+    """
+    previous = activate()
+    try:
+        yield active_memo()
+    finally:
+        deactivate(previous)
+
+
+def object_key(obj):
+    return obj.get_site().pk, ContentType.objects.get_for_model(obj).pk, force_text(obj.pk)
+
+
+def memoize(obj, key, compute):
+    """
+    Returns the memoized value for (obj, key), computing and storing it if there is none. If no memo is
+    active, it just returns ``compute()``. The key must tell apart every kind of lookup of an object,
+    e.g. ('count', edge type name) and ('edge', edge type name, user pk).
+    """
+    memo = active_memo()
+    if memo is None:
+        return compute()
+    obj_key = object_key(obj)
+    value = memo.get(obj_key, key)
+    if value is MISSING:
+        value = compute()
+        memo.set(obj_key, key, value)
+    return value
+
+
+def invalidate(obj):
+    memo = active_memo()
+    if memo is not None:
+        memo.invalidate(object_key(obj))
@@ -0,0 +1,24 @@
+# coding=utf-8
+import memo
+
+
+class InteractionMemoMiddleware(object):
+    """
+    Activates an interaction memo for each request, so the same interaction lookups made by the view,
+    the template filters and the mixins hit the graph only once per request.
+    """
+
+    def process_request(self, request):
+        request._interaction_memo_previous = memo.activate()
+
+    def process_response(self, request, response):
+        self._deactivate(request)
+        return response
+
+    def process_exception(self, request, exception):
+        self._deactivate(request)
+
+    def _deactivate(self, request):
+        if hasattr(request, '_interaction_memo_previous'):
+            memo.deactivate(request._interaction_memo_previous)
+            del request._interaction_memo_previous
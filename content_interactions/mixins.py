@@ -1,9 +1,17 @@
 # coding=utf-8
 import logging
+import time
+from collections import namedtuple
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
-from django.contrib.sites.models import Site
+from django.db import transaction
+from django.utils.encoding import force_text
 from social_graph import Graph
+from edge_types import registry as edge_type_registry
+from memo import memoize, invalidate as invalidate_memo
+from sites import get_current_site
+from utils import cache_lock, batches, send_by_model
 from . import (
     LIKE, LIKED_BY, RATE, RATED_BY, FAVORITE, FAVORITE_OF, DENOUNCE, DENOUNCED_BY,
     AUTHOR, AUTHORED_BY, TARGET, TARGETED_BY
@@ -16,180 +24,283 @@ from signals import (
     item_rated,
     item_rate_modified,
     item_denounced,
-    item_denounce_removed
+    item_denounce_removed,
+    items_liked,
+    items_marked_as_favorite,
+    items_rated,
+    items_denounced
 )
 
 logger = logging.getLogger(__name__)
 
 graph = Graph()
 
+RATING_VALUES = (1, 2, 3, 4, 5)
 
-def like_edge():
-    like = cache.get('LIKE_EDGE_TYPE')
-    if like is not None:
-        return like
-    from social_graph.models import EdgeType
+RatingHistogram = namedtuple('RatingHistogram', ('count', 'counts', 'sum', 'mean'))
+
+COMMENTING_USERS_CACHE_KEY = 'CONTENT_INTERACTIONS_COMMENTING_USERS_%s_%s'
+
+COMMENT_COUNT_CACHE_KEY = 'CONTENT_INTERACTIONS_COMMENT_COUNT_%s_%s'
+
+COMMENT_THREAD_VERSION_CACHE_KEY = 'CONTENT_INTERACTIONS_COMMENT_THREAD_VERSION_%s_%s_%s'
+
+
+def commenting_users_cache_key(content_type_pk, object_pk):
+    return COMMENTING_USERS_CACHE_KEY % (content_type_pk, force_text(object_pk))
+
+
+def comment_count_cache_key(content_type_pk, object_pk):
+    return COMMENT_COUNT_CACHE_KEY % (content_type_pk, force_text(object_pk))
+
+
+def comment_thread_version(content_type_pk, object_pk, site_pk):
+    """
+    The version of the comment thread of an object in a site, which keys the cached fragments of the
+    thread. A new version starts from the current time, so it is never lower than one dropped from the
+    cache.
+    """
+    key = COMMENT_THREAD_VERSION_CACHE_KEY % (site_pk, content_type_pk, force_text(object_pk))
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000))
+        version = cache.get(key)
+    return version
+
+
+def bump_comment_thread_version(content_type_pk, object_pk, site_pk):
     try:
-        like = EdgeType.objects.get(name=LIKE)
-        cache.set('LIKE_EDGE_TYPE', like)
-        return like
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+        cache.incr(COMMENT_THREAD_VERSION_CACHE_KEY % (site_pk, content_type_pk, force_text(object_pk)))
+    except ValueError:
+        pass
 
 
-def liked_by_edge():
-    liked_by = cache.get('LIKED_BY_EDGE_TYPE')
-    if liked_by is not None:
-        return liked_by
-    from social_graph.models import EdgeType
+def add_to_comment_count(content_type_pk, object_pk, delta):
+    """
+    Adds ``delta`` to the cached comment count of an object, if it is cached. Otherwise the count is
+    read again from the comments on next access.
+    """
+    key = comment_count_cache_key(content_type_pk, object_pk)
     try:
-        liked_by = EdgeType.objects.get(name=LIKED_BY)
-        cache.set('LIKED_BY_EDGE_TYPE', liked_by)
-        return liked_by
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+        if delta > 0:
+            cache.incr(key, delta)
+        elif delta < 0:
+            cache.decr(key, -delta)
+    except ValueError:
+        pass
+
+
+def like_edge():
+    return edge_type_registry.get(LIKE)
+
+
+def liked_by_edge():
+    return edge_type_registry.get(LIKED_BY)
 
 
 def rate_edge():
-    rate = cache.get('RATE_EDGE_TYPE')
-    if rate is not None:
-        return rate
-    from social_graph.models import EdgeType
-    try:
-        rate = EdgeType.objects.get(name=RATE)
-        cache.set('RATE_EDGE_TYPE', rate)
-        return rate
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(RATE)
 
 
 def rated_by_edge():
-    rated_by = cache.get('RATED_BY_EDGE_TYPE')
-    if rated_by is not None:
-        return rated_by
-    from social_graph.models import EdgeType
-    try:
-        rated_by = EdgeType.objects.get(name=RATED_BY)
-        cache.set('RATED_BY_EDGE_TYPE', rated_by)
-        return rated_by
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(RATED_BY)
 
 
 def favorite_edge():
-    favorite = cache.get('FAVORITE_EDGE_TYPE')
-    if favorite is not None:
-        return favorite
-    from social_graph.models import EdgeType
-    try:
-        favorite = EdgeType.objects.get(name=FAVORITE)
-        cache.set('FAVORITE_EDGE_TYPE', favorite)
-        return favorite
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(FAVORITE)
 
 
 def favorite_of_edge():
-    favorite_of = cache.get('FAVORITE_OF_EDGE_TYPE')
-    if favorite_of is not None:
-        return favorite_of
-    from social_graph.models import EdgeType
-    try:
-        favorite_of = EdgeType.objects.get(name=FAVORITE_OF)
-        cache.set('FAVORITE_OF_EDGE_TYPE', favorite_of)
-        return favorite_of
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(FAVORITE_OF)
 
 
 def denounce_edge():
-    denounce = cache.get('DENOUNCE_EDGE_TYPE')
-    if denounce is not None:
-        return denounce
-    from social_graph.models import EdgeType
-    try:
-        denounce = EdgeType.objects.get(name=DENOUNCE)
-        cache.set('DENOUNCE_EDGE_TYPE', denounce)
-        return denounce
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(DENOUNCE)
 
 
 def denounced_by_edge():
-    denounced_by = cache.get('DENOUNCED_BY_EDGE_TYPE')
-    if denounced_by is not None:
-        return denounced_by
-    from social_graph.models import EdgeType
-    try:
-        denounced_by = EdgeType.objects.get(name=DENOUNCED_BY)
-        cache.set('DENOUNCED_BY_EDGE_TYPE', denounced_by)
-        return denounced_by
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(DENOUNCED_BY)
 
 
 def author_edge():
-    author = cache.get('AUTHOR_EDGE_TYPE')
-    if author is not None:
-        return author
-    from social_graph.models import EdgeType
-    try:
-        author = EdgeType.objects.get(name=AUTHOR)
-        cache.set('AUTHOR_EDGE_TYPE', author)
-        return author
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(AUTHOR)
 
 
 def authored_by_edge():
-    authored_by = cache.get('AUTHORED_BY_EDGE_TYPE')
-    if authored_by is not None:
-        return authored_by
-    from social_graph.models import EdgeType
-    try:
-        authored_by = EdgeType.objects.get(name=AUTHORED_BY)
-        cache.set('AUTHORED_BY_EDGE_TYPE', authored_by)
-        return authored_by
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(AUTHORED_BY)
 
 
 def target_edge():
-    target = cache.get('TARGET_EDGE_TYPE')
-    if target is not None:
-        return target
-    from social_graph.models import EdgeType
-    try:
-        target = EdgeType.objects.get(name=TARGET)
-        cache.set('TARGET_EDGE_TYPE', target)
-        return target
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(TARGET)
 
 
 def targeted_by_edge():
-    targeted_by = cache.get('TARGETED_BY_EDGE_TYPE')
-    if targeted_by is not None:
-        return targeted_by
-    from social_graph.models import EdgeType
-    try:
-        targeted_by = EdgeType.objects.get(name=TARGETED_BY)
-        cache.set('TARGETED_BY_EDGE_TYPE', targeted_by)
-        return targeted_by
-    except EdgeType.DoesNotExist as e:
-        logger.exception(e)
+    return edge_type_registry.get(TARGETED_BY)
+
+
+def interaction_states(user, objects):
+    """
+    Returns a dict that maps each object in ``objects`` (a list or a queryset) to the state of its
+    interactions with the passed user: whether the user likes it, has it as favorite or has denounced
+    it, and the rating the user gave it. The edges are read with one query per content type and site.
+    """
+    objects = [obj for obj in objects if obj is not None]
+    states = dict(
+        (obj, {'liked': False, 'favorite': False, 'rating': None, 'denounced': False}) for obj in objects
+    )
+    if not objects or user is None or user.is_anonymous():
+        return states
+
+    from edges import edges_from
+    _types = (like_edge(), favorite_edge(), rate_edge(), denounce_edge())
+    state_keys = dict(zip([_type.pk for _type in _types], ('liked', 'favorite', 'rating', 'denounced')))
+    groups = {}
+    for obj in objects:
+        groups.setdefault((ContentType.objects.get_for_model(obj), obj.get_site()), {})[force_text(obj.pk)] = obj
+    for (content_type, site), nodes in groups.items():
+        _edges = edges_from(user, _types, site).filter(toNode_type=content_type, toNode_pk__in=list(nodes.keys()))
+        for _edge in _edges.only('toNode_pk', 'type', 'attributes'):
+            state_key = state_keys[_edge.type_id]
+            states[nodes[_edge.toNode_pk]][state_key] = (
+                _edge.attributes.get('rating') if state_key == 'rating' else True
+            )
+    return states
+
+
+def _bulk_edges(entries, edge_type, batch_size=None):
+    """
+    Writes an edge of the given type for each (user, item, attributes) entry, a batch at a time, with a
+    transaction per batch. Edges that already exist with the same attributes are skipped. No per item
+    signal is sent. Yields, for each batch, the written entries as (user, item, attributes, old
+    attributes) tuples, where old attributes is None for new edges.
+    """
+    from edges import existing_edges, node_key
+    for batch in batches(entries, batch_size or settings.CONTENT_INTERACTIONS_BULK_BATCH_SIZE):
+        existing = existing_edges([(user, item) for user, item, attributes in batch], edge_type)
+        written = []
+        with transaction.atomic():
+            for user, item, attributes in batch:
+                key = (node_key(user), node_key(item))
+                old_attributes = existing.get(key)
+                if old_attributes == attributes:
+                    continue
+                if graph.edge(user, item, edge_type, item.get_site(), attributes):
+                    existing[key] = attributes
+                    written.append((user, item, attributes, old_attributes))
+        for user, item, attributes, old_attributes in written:
+            invalidate_memo(item)
+            if isinstance(item, RateableMixin):
+                item._rating_histogram = None
+        yield written
+
+
+def _bulk_add(pairs, edge_type, signal, batch_size=None):
+    total = 0
+    for written in _bulk_edges(((user, item, {}) for user, item in pairs), edge_type, batch_size):
+        counts = {}
+        for user, item, attributes, old_attributes in written:
+            counts[item] = counts.get(item, 0) + 1
+        send_by_model(signal, counts)
+        total += len(written)
+    return total
+
+
+def bulk_like(pairs, batch_size=None):
+    """
+    Likes each item by its user, for the passed (user, item) pairs, in batches, and sends one
+    'items_liked' signal per batch and model. Returns the number of new likes.
+    """
+    return _bulk_add(pairs, like_edge(), items_liked, batch_size)
+
+
+def bulk_mark_as_favorite(pairs, batch_size=None):
+    """
+    Marks each item as favorite of its user, for the passed (user, item) pairs, in batches, and sends one
+    'items_marked_as_favorite' signal per batch and model. Returns the number of new favorite marks.
+    """
+    return _bulk_add(pairs, favorite_edge(), items_marked_as_favorite, batch_size)
+
+
+def bulk_rate(entries, batch_size=None):
+    """
+    Saves the rating of each item by its user, for the passed (user, item, rating) or (user, item,
+    rating, comment) tuples, in batches, and sends one 'items_rated' signal per batch and model, with
+    the count of new ratings and the delta of each rating value per item. Returns the number of ratings
+    written, new or changed.
+    """
+    entries = (
+        (entry[0], entry[1], {'rating': entry[2], 'comment': entry[3] if len(entry) > 3 else None})
+        for entry in entries
+    )
+    total = 0
+    for written in _bulk_edges(entries, rate_edge(), batch_size):
+        counts = {}
+        values = {}
+        for user, item, attributes, old_attributes in written:
+            counts.setdefault(item, 0)
+            item_values = values.setdefault(item, {})
+            if old_attributes is None:
+                counts[item] += 1
+            else:
+                item_values[old_attributes['rating']] = item_values.get(old_attributes['rating'], 0) - 1
+            item_values[attributes['rating']] = item_values.get(attributes['rating'], 0) + 1
+        send_by_model(items_rated, counts, values=values)
+        total += len(written)
+    return total
+
+
+def bulk_denounce(entries, batch_size=None):
+    """
+    Denounces each item by its user, for the passed (user, item, comment) tuples, in batches, and sends
+    one 'items_denounced' signal per batch and model. Returns the number of new denounces.
+    """
+    entries = ((user, item, {'comment': comment}) for user, item, comment in entries)
+    total = 0
+    for written in _bulk_edges(entries, denounce_edge(), batch_size):
+        counts = {}
+        for user, item, attributes, old_attributes in written:
+            if old_attributes is None:
+                counts[item] = counts.get(item, 0) + 1
+        send_by_model(items_denounced, counts)
+        total += len(written)
+    return total
 
 
 class ContentInteractionMixin(object):
 
     def get_site(self):
-        return getattr(self, 'site', Site.objects.get_current())
+        site = getattr(self, 'site', None)
+        return site if site is not None else get_current_site()
+
+    @classmethod
+    def interaction_states(cls, user, objects):
+        return interaction_states(user, objects)
+
+    def _edge_count(self, edge_type):
+        return memoize(self, ('count', edge_type.name), lambda: graph.edge_count(self, edge_type, self.get_site()))
+
+    def _edge_get(self, edge_type, user):
+        if getattr(user, 'pk', None) is None:
+            # anonymous and unsaved users have no edges
+            return None
+        return memoize(
+            self, ('edge', edge_type.name, user.pk), lambda: graph.edge_get(self, edge_type, user, self.get_site())
+        )
+
+    def _lock_key(self, edge_type, user):
+        return 'CONTENT_INTERACTIONS_LOCK_%s_%s_%s_%s_%s' % (
+            self.get_site().pk, ContentType.objects.get_for_model(self).pk, self.pk, edge_type.pk, user.pk
+        )
+
+    def iter_edge_nodes(self, edge_type, offset=0, limit=None, chunk_size=None, resolve=True):
+        from edges import iter_edge_nodes
+        return iter_edge_nodes(self, edge_type, self.get_site(), offset, limit, chunk_size, resolve)
 
 
 class LikableMixin(ContentInteractionMixin):
     @property
     def likes(self):
-        return graph.edge_count(self, liked_by_edge(), self.get_site())
+        return self._edge_count(liked_by_edge())
 
     @property
     def liking_users(self):
@@ -197,26 +308,47 @@ class LikableMixin(ContentInteractionMixin):
             self, liked_by_edge(), 0, self.likes, self.get_site()
         )]
 
+    def iter_liking_users(self, offset=0, limit=None, chunk_size=None, resolve=True):
+        return self.iter_edge_nodes(liked_by_edge(), offset, limit, chunk_size, resolve)
+
     def liked_by(self, user):
-        return graph.edge_get(self, liked_by_edge(), user, self.get_site()) is not None
+        return self._edge_get(liked_by_edge(), user) is not None
+
+    @classmethod
+    def bulk_like(cls, pairs, batch_size=None):
+        return bulk_like(pairs, batch_size)
 
     def like(self, user):
         _edge = graph.edge(user, self, like_edge(), self.get_site(), {})
+        invalidate_memo(self)
         if _edge:
             item_liked.send(sender=self.__class__, instance=self, user=user)
         return _edge
 
     def unlike(self, user):
         _deleted = graph.no_edge(user, self, like_edge(), self.get_site())
+        invalidate_memo(self)
         if _deleted:
             item_disliked.send(sender=self.__class__, instance=self, user=user)
         return _deleted
 
+    def toggle_like(self, user):
+        """
+        Removes the like of the user, or adds it if there was none, without looking it up first, and
+        returns whether the item is now liked by the user along with the new likes count. Concurrent
+        toggles of the same user and item are serialized.
+        """
+        with cache_lock(self._lock_key(like_edge(), user)):
+            liked = not self.unlike(user)
+            if liked:
+                self.like(user)
+        return liked, self.likes
+
 
 class FavoriteListItemMixin(ContentInteractionMixin):
     @property
     def favorite_marks(self):
-        return graph.edge_count(self, favorite_of_edge(), self.get_site())
+        return self._edge_count(favorite_of_edge())
 
     @property
     def favorite_marking_users(self):
@@ -224,27 +356,48 @@ class FavoriteListItemMixin(ContentInteractionMixin):
             self, favorite_of_edge(), 0, self.favorite_marks, self.get_site()
         )]
 
+    def iter_favorite_marking_users(self, offset=0, limit=None, chunk_size=None, resolve=True):
+        return self.iter_edge_nodes(favorite_of_edge(), offset, limit, chunk_size, resolve)
+
     def favorite_of(self, user):
-        return graph.edge_get(self, favorite_of_edge(), user, self.get_site()) is not None
+        return self._edge_get(favorite_of_edge(), user) is not None
+
+    @classmethod
+    def bulk_mark_as_favorite(cls, pairs, batch_size=None):
+        return bulk_mark_as_favorite(pairs, batch_size)
 
     def mark_as_favorite(self, user):
         _edge = graph.edge(user, self, favorite_edge(), self.get_site(), {})
+        invalidate_memo(self)
         if _edge:
             item_marked_as_favorite.send(sender=self.__class__, instance=self, user=user)
         return _edge
 
     def delete_favorite(self, user):
         _deleted = graph.no_edge(user, self, favorite_edge(), self.get_site())
+        invalidate_memo(self)
         if _deleted:
             item_unmarked_as_favorite.send(sender=self.__class__, instance=self, user=user)
         return _deleted
 
+    def toggle_favorite(self, user):
+        """
+        Removes the favorite mark of the user, or adds it if there was none, without looking it up first,
+        and returns whether the item is now a favorite of the user along with the new favorite marks
+        count. Concurrent toggles of the same user and item are serialized.
+        """
+        with cache_lock(self._lock_key(favorite_edge(), user)):
+            favorite = not self.delete_favorite(user)
+            if favorite:
+                self.mark_as_favorite(user)
+        return favorite, self.favorite_marks
+
 
 class RateableMixin(ContentInteractionMixin):
 
     @property
     def ratings(self):
-        return graph.edge_count(self, rated_by_edge(), self.get_site())
+        return self._edge_count(rated_by_edge())
 
     @property
     def rating_users(self):
@@ -252,20 +405,37 @@ class RateableMixin(ContentInteractionMixin):
             self, rated_by_edge(), 0, self.ratings, self.get_site()
         )]
 
+    def iter_rating_users(self, offset=0, limit=None, chunk_size=None, resolve=True):
+        return self.iter_edge_nodes(rated_by_edge(), offset, limit, chunk_size, resolve)
+
     @property
     def avg_rating(self):
-        return (
-            5 * self.rating_of(5)
-            + 4 * self.rating_of(4)
-            + 3 * self.rating_of(3)
-            + 2 * self.rating_of(2)
-            + self.rating_of(1)
-        )/(self.ratings * float(1)) if self.ratings else 0
-
-    def rating_of(self, rating_value):
+        return self.rating_histogram().mean
+
+    def rating_histogram(self):
+        """
+        Reads all the ratings of this item at once, and returns their count, the count of each rating
+        value, their sum and their mean. The result is kept in the instance until its ratings change.
+        """
+        histogram = getattr(self, '_rating_histogram', None)
+        if histogram is None:
+            histogram = memoize(self, ('rating histogram',), self._read_rating_histogram)
+            self._rating_histogram = histogram
+        return histogram
+
+    def _read_rating_histogram(self):
         from social_graph import ATTRIBUTES_INDEX
+        counts = dict((value, 0) for value in RATING_VALUES)
         _edges = graph.edge_range(self, rated_by_edge(), 0, self.ratings, self.get_site())
-        return len([_edge for _edge in _edges if _edge[ATTRIBUTES_INDEX]['rating'] == rating_value])
+        for _edge in _edges:
+            rating = _edge[ATTRIBUTES_INDEX]['rating']
+            counts[rating] = counts.get(rating, 0) + 1
+        count = sum(counts.values())
+        total = sum(value * value_count for value, value_count in counts.items())
+        return RatingHistogram(count, counts, total, total/(count * float(1)) if count else 0)
+
+    def rating_of(self, rating_value):
+        return self.rating_histogram().counts.get(rating_value, 0)
 
     def rating_of_one(self):
         return self.rating_of(1)
@@ -283,11 +453,11 @@ class RateableMixin(ContentInteractionMixin):
         return self.rating_of(5)
 
     def rating(self, user):
-        _edge = graph.edge_get(self, rated_by_edge(), user, self.get_site())
+        _edge = self._edge_get(rated_by_edge(), user)
         return _edge.attributes['rating'] if _edge is not None else None
 
     def full_rating(self, user):
-        _edge = graph.edge_get(self, rated_by_edge(), user, self.get_site())
+        _edge = self._edge_get(rated_by_edge(), user)
         return (
             _edge.attributes['rating'] if _edge is not None else None,
             _edge.attributes['comment'] if _edge is not None else None,
@@ -295,10 +465,16 @@ class RateableMixin(ContentInteractionMixin):
         )
 
     def rated_by(self, user):
-        return graph.edge_get(self, rated_by_edge(), user, self.get_site()) is not None
+        return self._edge_get(rated_by_edge(), user) is not None
+
+    @classmethod
+    def bulk_rate(cls, entries, batch_size=None):
+        return bulk_rate(entries, batch_size)
 
     def save_rate(self, user, rating, comment=None):
         _edge = graph.edge(user, self, rate_edge(), self.get_site(), {'rating': rating, 'comment': comment})
+        invalidate_memo(self)
+        self._rating_histogram = None
         if _edge:
             item_rated.send(sender=self.__class__, instance=self, user=user, rating=rating, comment=comment)
         return _edge
@@ -306,6 +482,8 @@ class RateableMixin(ContentInteractionMixin):
     def change_rate(self, user, rating, comment=None):
         old_rating = self.rating(user)
         _edge = graph.edge(user, self, rate_edge(), self.get_site(), {'rating': rating, 'comment': comment})
+        invalidate_memo(self)
+        self._rating_histogram = None
         if _edge:
             item_rate_modified.send(
                 sender=self.__class__,
@@ -321,7 +499,7 @@ class RateableMixin(ContentInteractionMixin):
 class DenounceTargetMixin(ContentInteractionMixin):
     @property
     def denounces(self):
-        return graph.edge_count(self, denounced_by_edge(), self.get_site())
+        return self._edge_count(denounced_by_edge())
 
     @property
     def denouncing_users(self):
@@ -329,21 +507,30 @@ class DenounceTargetMixin(ContentInteractionMixin):
             self, denounced_by_edge(), 0, self.denounces, self.get_site()
         )]
 
+    def iter_denouncing_users(self, offset=0, limit=None, chunk_size=None, resolve=True):
+        return self.iter_edge_nodes(denounced_by_edge(), offset, limit, chunk_size, resolve)
+
     def denounced_by(self, user):
-        return graph.edge_get(self, denounced_by_edge(), user, self.get_site()) is not None
+        return self._edge_get(denounced_by_edge(), user) is not None
 
     def denounce_comment(self, user):
-        _edge = graph.edge_get(self, denounced_by_edge(), user, self.get_site())
+        _edge = self._edge_get(denounced_by_edge(), user)
         return _edge.attributes['comment'] if _edge is not None else None
 
+    @classmethod
+    def bulk_denounce(cls, entries, batch_size=None):
+        return bulk_denounce(entries, batch_size)
+
     def denounce(self, user, comment):
         _edge = graph.edge(user, self, denounce_edge(), self.get_site(), {'comment': comment})
+        invalidate_memo(self)
         if _edge:
             item_denounced.send(sender=self.__class__, instance=self, user=user, comment=comment)
         return _edge
 
     def remove_denounce(self, user):
         _deleted = graph.no_edge(user, self, denounce_edge(), self.get_site())
+        invalidate_memo(self)
         if _deleted:
             item_denounce_removed.send(sender=self.__class__, instance=self, user=user)
         return _deleted
@@ -372,19 +559,45 @@ class CommentTargetMixin(ContentInteractionMixin):
 
     @property
     def comments(self):
-        return self.comment_list.count()
+        """
+        The number of comments of this object, counted once and then kept in the cache, updated by
+        the comment signals. The stats app replaces it with the 'comments' counter of the stats.
+        """
+        key = comment_count_cache_key(ContentType.objects.get_for_model(self).pk, self.pk)
+        count = cache.get(key)
+        if count is None:
+            count = self.comment_list.count()
+            cache.add(key, count, settings.COMMENT_COUNT_CACHE_TIMEOUT)
+        return count
 
     @property
     def commenting_users(self):
-        return set([comment.user for comment in self.comment_list if comment.user])
+        from django.contrib.auth.models import User
+        return set(User.objects.in_bulk(list(self.commenting_user_pks)).values())
 
     @property
     def commenting_user_pks(self):
-        return set([comment.user.pk for comment in self.comment_list if comment.user])
+        """
+        The pks of the users that have commented this object, read with one DISTINCT query and kept in
+        the cache until a comment of the object is posted or removed.
+        """
+        key = commenting_users_cache_key(ContentType.objects.get_for_model(self).pk, self.pk)
+        user_pks = cache.get(key)
+        if user_pks is None:
+            user_pks = frozenset(
+                self.comment_list.filter(user__isnull=False).values_list('user', flat=True).distinct()
+            )
+            cache.set(key, user_pks, settings.COMMENTING_USERS_CACHE_TIMEOUT)
+        return user_pks
 
     def commented_by(self, user):
         from django.contrib.auth.models import User
-        return isinstance(user, User) and (user.pk in self.commenting_user_pks)
+        if not isinstance(user, User):
+            return False
+        user_pks = cache.get(commenting_users_cache_key(ContentType.objects.get_for_model(self).pk, self.pk))
+        if user_pks is not None:
+            return user.pk in user_pks
+        return self.comment_list.filter(user=user).exists()
 
 
 class ShareToSocialNetworkTargetMixin(ContentInteractionMixin):
@@ -399,42 +612,33 @@ class ShareToSocialNetworkTargetMixin(ContentInteractionMixin):
 
 
 class LikableManagerMixin(object):
-    graph = graph
-
-    def liked_by(self, user):
-        like = like_edge()
-        count = self.graph.edge_count(user, like)
-        content_type = ContentType.objects.get_for_model(self.model)
-        ids = [
-            node.pk for node, attributes, time in self.graph.edge_range(user, like, 0, count)
-            if ContentType.objects.get_for_model(node) == content_type
-        ]
-        return self.get_queryset().filter(pk__in=ids)
+    def liked_by(self, user, before=None):
+        """
+        QuerySet of the items liked by the passed user, most recently liked first. Each item gets the time
+        of the like as ``edge_time``; pass the (``edge_time``, pk) of the last one as ``before`` to page through
+        the list.
+        """
+        from edges import edge_targets
+        return edge_targets(self.get_queryset(), user, like_edge(), get_current_site(), before)
 
 
 class FavoriteListItemManagerMixin(object):
-    graph = graph
-
-    def favorites(self, user):
-        favorite = favorite_edge()
-        count = self.graph.edge_count(user, favorite)
-        content_type = ContentType.objects.get_for_model(self.model)
-        ids = [
-            node.pk for node, attributes, time in self.graph.edge_range(user, favorite, 0, count)
-            if ContentType.objects.get_for_model(node) == content_type
-        ]
-        return self.get_queryset().filter(pk__in=ids)
+    def favorites(self, user, before=None):
+        """
+        QuerySet of the favorite items of the passed user, most recently marked first. Each item gets the
+        time of the mark as ``edge_time``; pass the (``edge_time``, pk) of the last one as ``before`` to page
+        through the list.
+        """
+        from edges import edge_targets
+        return edge_targets(self.get_queryset(), user, favorite_edge(), get_current_site(), before)
 
 
 class DenounceTargetManagerMixin(object):
-    graph = graph
-
-    def denounced_by(self, user):
-        denounce = denounce_edge()
-        count = self.graph.edge_count(user, denounce)
-        content_type = ContentType.objects.get_for_model(self.model)
-        ids = [
-            node.pk for node, attributes, time in self.graph.edge_range(user, denounce, 0, count)
-            if ContentType.objects.get_for_model(node) == content_type
-        ]
-        return self.get_queryset().filter(pk__in=ids)
\ No newline at end of file
+    def denounced_by(self, user, before=None):
+        """
+        QuerySet of the items denounced by the passed user, most recently denounced first. Each item gets the
+        time of the denounce as ``edge_time``; pass the (``edge_time``, pk) of the last one as ``before`` to
+        page through the list.
+        """
+        from edges import edge_targets
+        return edge_targets(self.get_queryset(), user, denounce_edge(), get_current_site(), before)
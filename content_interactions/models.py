@@ -7,19 +7,27 @@ try:
 except ImportError:
     from django.contrib.contenttypes.generic import GenericForeignKey
 
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.core import urlresolvers
+from django.core.cache import cache
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ValidationError
-from django.utils.encoding import python_2_unicode_compatible
+from django.utils.encoding import python_2_unicode_compatible, force_text
 
 from social_graph import Graph
+from social_graph.models import EdgeType
 
 from managers import CommentManager, CommentCurrentSiteManager
-from mixins import author_edge, target_edge
-from signals import item_commented, item_comment_removed
+from edge_types import registry as edge_type_registry
+from edges import find_edges
+from mixins import (
+    author_edge, target_edge, commenting_users_cache_key, add_to_comment_count, bump_comment_thread_version
+)
+from signals import item_commented, item_comment_removed, items_commented
+from sites import clear_site_cache, get_site
 
 graph = Graph()
 
@@ -35,6 +43,8 @@ class BaseCommentAbstractModel(models.Model):
                                      verbose_name=_(u'content type'),
                                      related_name="content_type_set_for_%(class)s")
     object_pk = models.TextField(_(u'object ID'))
+    # Integer copy of 'object_pk', for objects with integer primary keys, which can be indexed.
+    object_id = models.PositiveIntegerField(_(u'object ID (integer)'), blank=True, null=True)
     content_object = GenericForeignKey(ct_field="content_type", fk_field="object_pk")
 
     # Metadata about the comment
@@ -92,6 +102,9 @@ class Comment(BaseCommentAbstractModel):
 
     class Meta:
         ordering = ('submit_date',)
+        index_together = [
+            ('content_type', 'object_id', 'site', 'is_removed', 'answer_to', 'submit_date'),
+        ]
         permissions = [("can_moderate", "Can moderate comments")]
         verbose_name = _(u'comment')
         verbose_name_plural = _(u'comments')
@@ -172,10 +185,55 @@ class Comment(BaseCommentAbstractModel):
         return _(u'Posted by %(user)s at %(date)s\n\n%(comment)s\n\nhttp://%(domain)s%(url)s') % data
 
     def delete(self, using=None):
-        for answer in self.answers.all():
-            answer.delete()
+        """
+        Marks this comment and all its answers, at any level, as removed. The thread is read with one
+        query and updated with another one, the author and target edges of the removed comments are
+        found with one query each and removed through the graph, and a single ``item_comment_removed``
+        signal is sent, with the number of removed comments as ``count``.
+        """
+        content_object = self.content_object
+        thread = Comment.objects.for_model(content_object).values_list('pk', 'answer_to', 'user', 'site')
+        answers = {}
+        for pk, answer_to, user, site in thread:
+            answers.setdefault(answer_to, []).append((pk, user, site))
+
+        removed, users, sites = [self.pk], set(), set([self.site_id])
+        if self.user_id:
+            users.add(self.user_id)
+        pending = [self.pk]
+        while pending:
+            for pk, user, site in answers.get(pending.pop(), ()):
+                removed.append(pk)
+                pending.append(pk)
+                sites.add(site)
+                if user:
+                    users.add(user)
+
+        Comment.objects.filter(pk__in=removed).update(is_removed=True)
         self.is_removed = True
-        self.save()
+
+        # only the existing edges are removed, through the graph, which also removes their inverse edges
+        # and keeps its edge counts and cached reads current
+        comment_type = ContentType.objects.get_for_model(Comment)
+        user_type = ContentType.objects.get_for_model(get_user_model())
+        object_type = ContentType.objects.get_for_model(content_object)
+        author_edges = find_edges(author_edge(), user_type, users, comment_type, removed, sites)
+        target_edges = find_edges(target_edge(), comment_type, removed, object_type, [content_object.pk], sites)
+        comments = dict(
+            (force_text(pk), comment) for pk, comment in Comment._base_manager.in_bulk(removed).items()
+        )
+        authors = dict(
+            (force_text(pk), user) for pk, user in get_user_model()._default_manager.in_bulk(users).items()
+        )
+        for user_pk, comment_pk, site_pk in author_edges:
+            graph.no_edge(authors[user_pk], comments[comment_pk], author_edge(), get_site(site_pk))
+        for comment_pk, object_pk, site_pk in target_edges:
+            graph.no_edge(comments[comment_pk], content_object, target_edge(), get_site(site_pk))
+
+        item_comment_removed.send(
+            sender=Comment, instance=self, user=content_object.get_comments_manager() or self.user,
+            count=len(removed)
+        )
 
 
 @receiver(models.signals.pre_save, sender=Comment, dispatch_uid="fill_comment_user_data")
@@ -185,6 +243,8 @@ def fill_comment_user_data(instance, **kwargs):
         instance.user_email = instance.user.email
     if not instance.level:
         instance.level = instance.answer_to.level + 1 if instance.answer_to else 1
+    if instance.object_id is None and force_text(instance.object_pk).isdigit():
+        instance.object_id = int(instance.object_pk)
 
 
 @receiver(models.signals.post_save, sender=Comment, dispatch_uid="manage_comment_edges")
@@ -201,5 +261,54 @@ def create_comment_edges(instance, created, **kwargs):
         graph.no_edge(instance, instance.content_object, target_edge(), instance.site)
 
         item_comment_removed.send(
-            sender=Comment, instance=instance, user=instance.content_object.get_comments_manager() or instance.user
-        )
\ No newline at end of file
+            sender=Comment, instance=instance, user=instance.content_object.get_comments_manager() or instance.user,
+            count=1
+        )
+
+
+# noinspection PyUnusedLocal
+@receiver(item_commented, sender=Comment, dispatch_uid="invalidate_commenting_users_on_comment")
+@receiver(item_comment_removed, sender=Comment, dispatch_uid="invalidate_commenting_users_on_comment_removed")
+def invalidate_commenting_users(instance, **kwargs):
+    cache.delete(commenting_users_cache_key(instance.content_type_id, instance.object_pk))
+
+
+# noinspection PyUnusedLocal
+@receiver(item_commented, sender=Comment, dispatch_uid="count_comment")
+def count_comment(instance, **kwargs):
+    add_to_comment_count(instance.content_type_id, instance.object_pk, 1)
+
+
+# noinspection PyUnusedLocal
+@receiver(item_comment_removed, sender=Comment, dispatch_uid="count_comment_removed")
+def count_comment_removed(instance, count=1, **kwargs):
+    add_to_comment_count(instance.content_type_id, instance.object_pk, -count)
+
+
+# noinspection PyUnusedLocal
+@receiver(items_commented, dispatch_uid="count_comments")
+def count_comments(sender, counts, **kwargs):
+    content_type = ContentType.objects.get_for_model(sender)
+    for item, count in counts.items():
+        add_to_comment_count(content_type.pk, item.pk, count)
+
+
+# noinspection PyUnusedLocal
+@receiver(item_commented, sender=Comment, dispatch_uid="bump_comment_thread_version_on_comment")
+@receiver(item_comment_removed, sender=Comment, dispatch_uid="bump_comment_thread_version_on_comment_removed")
+def bump_thread_version(instance, **kwargs):
+    bump_comment_thread_version(instance.content_type_id, instance.object_pk, instance.site_id)
+
+
+# noinspection PyUnusedLocal
+@receiver(models.signals.post_save, sender=EdgeType, dispatch_uid="invalidate_edge_types_on_save")
+@receiver(models.signals.post_delete, sender=EdgeType, dispatch_uid="invalidate_edge_types_on_delete")
+def invalidate_edge_types(**kwargs):
+    edge_type_registry.invalidate()
+
+
+# noinspection PyUnusedLocal
+@receiver(models.signals.post_save, sender=Site, dispatch_uid="clear_site_cache_on_save")
+@receiver(models.signals.post_delete, sender=Site, dispatch_uid="clear_site_cache_on_delete")
+def clear_current_site(**kwargs):
+    clear_site_cache()
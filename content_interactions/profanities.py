@@ -0,0 +1,140 @@
+# coding=utf-8
+"""
+Matching of the comments against PROFANITIES_LIST.
+
+The words are compiled into an Aho-Corasick automaton, built once per process and rebuilt only when
+the list (or one of the matching settings) changes, so each comment is checked in a single pass,
+whatever the length of the list.
+"""
+import threading
+import unicodedata
+from django.conf import settings
+from django.dispatch import receiver
+from django.utils.encoding import force_text
+
+try:
+    from django.core.signals import setting_changed
+except ImportError:
+    from django.test.signals import setting_changed
+
+
+def normalize(text):
+    """
+    Lowercases the text and, in its compatibility decomposition, drops the combining marks, so 'Ｃafé'
+    reads as 'cafe'.
+    """
+    text = unicodedata.normalize('NFKD', force_text(text))
+    return u''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+class ProfanityMatcher(object):
+    """
+    Finds which of the given words appear in a text. If ``word_boundaries`` is True a word only
+    matches as a whole word, not inside another one. If ``normalize`` is True the words and the texts
+    are compared after ``normalize``, otherwise they are just lowercased.
+    """
+
+    def __init__(self, words, word_boundaries=False, normalize=False):
+        self.words = [force_text(word) for word in words if word]
+        self.word_boundaries = word_boundaries
+        self.normalize = normalize
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for index, word in enumerate(self.words):
+            self._add(self._prepare(word), index)
+        self._link()
+
+    def _prepare(self, text):
+        return normalize(text) if self.normalize else force_text(text).lower()
+
+    def _add(self, word, index):
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += ((index, len(word)),)
+
+    def _link(self):
+        # breadth first, so the failure state of each state is linked before its children
+        queue = list(self._goto[0].values())
+        position = 0
+        while position < len(queue):
+            state = queue[position]
+            position += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """
+        Returns the words found in the text, in the order of the list.
+        """
+        text = self._prepare(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index, length in output[state]:
+                if index in found:
+                    continue
+                if self.word_boundaries and not self._is_word(text, position - length + 1, position + 1):
+                    continue
+                found.add(index)
+        return [self.words[index] for index in sorted(found)]
+
+    def _is_word(self, text, start, end):
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+_lock = threading.Lock()
+_matcher = None
+_matcher_key = None
+
+
+def get_matcher():
+    """
+    Returns the matcher of PROFANITIES_LIST, building it if the list or the matching settings changed
+    since the last call.
+    """
+    global _matcher, _matcher_key
+    words = getattr(settings, 'PROFANITIES_LIST', None) or ()
+    key = (
+        id(words), len(words), settings.COMMENTS_PROFANITIES_WORD_BOUNDARIES, settings.COMMENTS_PROFANITIES_NORMALIZE
+    )
+    if key != _matcher_key:
+        with _lock:
+            if key != _matcher_key:
+                _matcher = ProfanityMatcher(
+                    words,
+                    word_boundaries=settings.COMMENTS_PROFANITIES_WORD_BOUNDARIES,
+                    normalize=settings.COMMENTS_PROFANITIES_NORMALIZE
+                )
+                _matcher_key = key
+    return _matcher
+
+
+def find_profanities(text):
+    return get_matcher().find(text)
+
+
+# noinspection PyUnusedLocal
+@receiver(setting_changed, dispatch_uid="reset_profanity_matcher")
+def reset_matcher(setting, **kwargs):
+    global _matcher, _matcher_key
+    if setting in ('PROFANITIES_LIST', 'COMMENTS_PROFANITIES_WORD_BOUNDARIES', 'COMMENTS_PROFANITIES_NORMALIZE'):
+        with _lock:
+            _matcher, _matcher_key = None, None
@@ -6,4 +6,33 @@ COMMENT_MAX_LENGTH = getattr(settings, 'COMMENT_MAX_LENGTH', 3000)
 setattr(settings, 'COMMENT_MAX_LENGTH', COMMENT_MAX_LENGTH)
 
 COMMENT_MAX_LEVELS = getattr(settings, 'COMMENT_MAX_LEVELS', 1)
-setattr(settings, 'COMMENT_MAX_LEVELS', COMMENT_MAX_LEVELS)
\ No newline at end of file
+setattr(settings, 'COMMENT_MAX_LEVELS', COMMENT_MAX_LEVELS)
+
+COMMENT_PAGE_SIZE = getattr(settings, 'COMMENT_PAGE_SIZE', 20)
+setattr(settings, 'COMMENT_PAGE_SIZE', COMMENT_PAGE_SIZE)
+
+# seconds the rendered comment threads are cached (0 disables it), bounded by their relative dates
+COMMENT_THREAD_CACHE_TIMEOUT = getattr(settings, 'COMMENT_THREAD_CACHE_TIMEOUT', 300)
+setattr(settings, 'COMMENT_THREAD_CACHE_TIMEOUT', COMMENT_THREAD_CACHE_TIMEOUT)
+
+# seconds the comment counts are cached, bounding the drift of a missed update
+COMMENT_COUNT_CACHE_TIMEOUT = getattr(settings, 'COMMENT_COUNT_CACHE_TIMEOUT', 3600)
+setattr(settings, 'COMMENT_COUNT_CACHE_TIMEOUT', COMMENT_COUNT_CACHE_TIMEOUT)
+
+# seconds the pks of the commenting users of an object are cached
+COMMENTING_USERS_CACHE_TIMEOUT = getattr(settings, 'COMMENTING_USERS_CACHE_TIMEOUT', 3600)
+setattr(settings, 'COMMENTING_USERS_CACHE_TIMEOUT', COMMENTING_USERS_CACHE_TIMEOUT)
+
+# profanities: match whole words only, and/or ignoring accents and compatibility forms
+COMMENTS_PROFANITIES_WORD_BOUNDARIES = getattr(settings, 'COMMENTS_PROFANITIES_WORD_BOUNDARIES', False)
+setattr(settings, 'COMMENTS_PROFANITIES_WORD_BOUNDARIES', COMMENTS_PROFANITIES_WORD_BOUNDARIES)
+
+COMMENTS_PROFANITIES_NORMALIZE = getattr(settings, 'COMMENTS_PROFANITIES_NORMALIZE', False)
+setattr(settings, 'COMMENTS_PROFANITIES_NORMALIZE', COMMENTS_PROFANITIES_NORMALIZE)
+
+# edges
+CONTENT_INTERACTIONS_EDGE_CHUNK_SIZE = getattr(settings, 'CONTENT_INTERACTIONS_EDGE_CHUNK_SIZE', 500)
+setattr(settings, 'CONTENT_INTERACTIONS_EDGE_CHUNK_SIZE', CONTENT_INTERACTIONS_EDGE_CHUNK_SIZE)
+
+CONTENT_INTERACTIONS_BULK_BATCH_SIZE = getattr(settings, 'CONTENT_INTERACTIONS_BULK_BATCH_SIZE', 1000)
+setattr(settings, 'CONTENT_INTERACTIONS_BULK_BATCH_SIZE', CONTENT_INTERACTIONS_BULK_BATCH_SIZE)
@@ -11,4 +11,9 @@ item_denounced = Signal(providing_args=['instance', 'user', 'comment'])
 item_denounce_removed = Signal(providing_args=['instance', 'user'])
 item_shared = Signal(providing_args=['instance', 'user', 'addressee_list', 'comment'])
 item_commented = Signal(providing_args=['instance', 'user', 'answer_to'])
-item_comment_removed = Signal(providing_args=['instance', 'user'])
+item_comment_removed = Signal(providing_args=['instance', 'user', 'count'])
+items_liked = Signal(providing_args=['counts'])
+items_marked_as_favorite = Signal(providing_args=['counts'])
+items_rated = Signal(providing_args=['counts', 'values'])
+items_denounced = Signal(providing_args=['counts'])
+items_commented = Signal(providing_args=['counts'])
@@ -0,0 +1,47 @@
+# coding=utf-8
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.contrib.sites.models import Site
+
+_local = threading.local()
+_sites = {}
+
+
+def get_current_site():
+    """
+    Returns the site pinned for the current thread (see ``pinned_site``) if any, or else the current
+    site, which is read once per process and kept until a site is saved or deleted.
+    """
+    site = getattr(_local, 'site', None)
+    if site is not None:
+        return site
+    return get_site(settings.SITE_ID)
+
+
+def get_site(pk):
+    """
+    Returns the site with the passed pk, read once per process and kept until a site is saved or deleted.
+    """
+    site = _sites.get(pk)
+    if site is None:
+        site = Site.objects.get(pk=pk)
+        _sites[pk] = site
+    return site
+
+
+def clear_site_cache():
+    _sites.clear()
+
+
+@contextmanager
+def pinned_site(site):
+    """
+    Makes ``get_current_site`` return the passed site, in the current thread, within the enclosed block.
+    """
+    previous = getattr(_local, 'site', None)
+    _local.site = site
+    try:
+        yield site
+    finally:
+        _local.site = previous
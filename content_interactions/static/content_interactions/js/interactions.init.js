@@ -4,6 +4,12 @@ $(function() {
     var basicToggleInteraction = new ToggleInteraction();
     basicToggleInteraction.config();
 
+    /* Default configuration for the "load more" link of the comment lists */
+    var loadMoreInteraction = new LoadMoreInteraction();
+
+    /* Default configuration for the edit and delete links of the comment threads */
+    var commentPermissionInteraction = new CommentPermissionInteraction();
+
     /*
     // Advanced configuration [Example]
 
@@ -106,4 +106,111 @@ var FormInteraction = iClazz(Interaction, {
     },
 
     eventImpl: function(eventTrigger) {}
-});
\ No newline at end of file
+});
+
+var LoadMoreInteraction = iClazz(Interaction, {
+
+    config: function(options) {
+        this.options = {
+            selector: '.load_more_comments',
+            eventType: 'click',
+            container: $('body')
+        };
+
+        if (typeof options == 'object') $.extend(this.options, options);
+
+        this.init();
+    },
+
+    init: function() {
+        var container = this.options.container,
+            $class = this;
+
+        if (container && (typeof container == 'object' && container[0] instanceof Element)) {
+            container.delegate(this.options.selector, this.options.eventType, function(e) {
+                e.preventDefault();
+
+                var $this = $(this),
+                    url = $this.attr('href') || $this.data('url');
+
+                if ($this.hasClass('loading')) return;
+                $this.addClass('loading');
+
+                $.ajax(url, {
+                    type: 'GET',
+                    context: this,
+                    success: function(response, status, xhr) {
+                        $class.success(response, status, xhr, this);
+                    },
+                    error: function(response, status, xhr) {
+                        $(this).removeClass('loading');
+                        $class.error(response, status, xhr, this);
+                    },
+                    dataType: "html"
+                });
+            });
+
+        } else {
+            throw new Error('Error: this.options.container expects an HTML Element.');
+        }
+    },
+
+    /* Appends the comments of the next page to the list, and replaces the link with the one of the page */
+    success: function(response, status, xhr, context) {
+        var $context = $(context),
+            page = $('<div>').html(response),
+            list = $context.data('list');
+
+        var comments = page.find(list).children();
+        $(list).append(comments);
+        $context.replaceWith(page.find(this.options.selector));
+        comments.trigger('comments.loaded');
+    },
+
+    error: function(response, status, xhr, context) {}
+});
+
+
+/*
+ Shows the edit and delete links of the viewer over the comment threads, which are rendered (and cached) without
+ them. Trigger 'comments.loaded' on the comments inserted by other means.
+*/
+var CommentPermissionInteraction = iClazz(Interaction, {
+
+    config: function(options) {
+        this.options = {
+            container: '#comment_thread',
+            item: '.comment_item'
+        };
+
+        if (typeof options == 'object') $.extend(this.options, options);
+
+        this.init();
+    },
+
+    init: function() {
+        var $class = this;
+
+        $(document).on('comments.loaded', function(e) {
+            $class.apply($(e.target));
+        });
+        this.apply($(this.options.container));
+    },
+
+    apply: function(context) {
+        var container = $(this.options.container),
+            viewer = String(container.data('viewer') || ''),
+            manager = String(container.data('manager')) == '1',
+            items = context.is(this.options.item) ? context : context.find(this.options.item);
+
+        if (!viewer) return;
+
+        items.each(function() {
+            var $item = $(this),
+                own = String($item.data('author') || '') == viewer;
+
+            if (own) $item.find('.edit_comment').show();
+            if (own || manager) $item.find('.delete_comment').show();
+        });
+    }
+});
@@ -11,15 +11,15 @@ def social_networks_publish_action_message(message, content_type_pk, object_pk,
     try:
         from django.contrib.auth.models import User
         from django.contrib.contenttypes.models import ContentType
-        from django.contrib.sites.models import Site
         from django.utils.translation import ugettext as _
+        from content_interactions.sites import get_site
         from social_publisher.publisher import get_publisher
         from social_publisher.models import SocialNetwork
         from common.utils import social_network_share_app_name
 
         try:
-            content_object = ContentType.objects.get(pk=content_type_pk).get_object_for_this_type(pk=object_pk)
-            site = Site.objects.get(pk=site_pk)
+            content_object = ContentType.objects.get_for_id(content_type_pk).get_object_for_this_type(pk=object_pk)
+            site = get_site(site_pk)
             user = User.objects.get(pk=user_pk)
 
             social_networks = SocialNetwork.objects.filter(
@@ -66,15 +66,15 @@ def social_networks_publish_message(message, content_type_pk, object_pk, user_pk
     try:
         from django.contrib.auth.models import User
         from django.contrib.contenttypes.models import ContentType
-        from django.contrib.sites.models import Site
         from django.utils.translation import ugettext as _
+        from content_interactions.sites import get_site
         from social_publisher.publisher import get_publisher
         from social_publisher.models import SocialNetwork
         from common.utils import social_network_share_app_name
 
         try:
-            content_object = ContentType.objects.get(pk=content_type_pk).get_object_for_this_type(pk=object_pk)
-            site = Site.objects.get(pk=site_pk)
+            content_object = ContentType.objects.get_for_id(content_type_pk).get_object_for_this_type(pk=object_pk)
+            site = get_site(site_pk)
             user = User.objects.get(pk=user_pk)
 
             social_networks = SocialNetwork.objects.filter(
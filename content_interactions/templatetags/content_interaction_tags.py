@@ -3,7 +3,10 @@ from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django import template
 from ..models import Comment
-from ..mixins import LikableMixin, FavoriteListItemMixin, RateableMixin, DenounceTargetMixin
+from ..mixins import (
+    LikableMixin, FavoriteListItemMixin, RateableMixin, DenounceTargetMixin,
+    interaction_states as interaction_states_function
+)
 from ..utils import intmin as intmin_function
 
 register = template.Library()
@@ -80,6 +83,30 @@ def denounced_by(obj, user):
     return obj.denounced_by(user)
 
 
+@register.assignment_tag
+def interaction_states(objects, user):
+    """
+    Returns the interaction states of the passed user with every object of the passed list, reading
+    them all at once. Use it along with the 'interaction_state' filter:
+
+    {% interaction_states object_list user as states %}
+    {% for obj in object_list %}
+        {% with state=states|interaction_state:obj %}{{ state.liked }} {{ state.rating }}{% endwith %}
+    {% endfor %}
+    """
+    if not objects:
+        return {}
+    return interaction_states_function(user, objects)
+
+
+@register.filter
+def interaction_state(states, obj):
+    """
+    Returns the interaction state of the passed obj, from the result of the 'interaction_states' tag.
+    """
+    return states.get(obj, {}) if states else {}
+
+
 @register.filter(is_safe=False)
 def intmin(value):
     """
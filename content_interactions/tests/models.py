@@ -1,10 +1,22 @@
 # coding=utf-8
 from django.db import models
 from social_graph import crud_aware
-from content_interactions.mixins import LikableMixin, DenounceTargetMixin, FavoriteListItemMixin, RateableMixin
+from content_interactions.mixins import (
+    LikableMixin, DenounceTargetMixin, FavoriteListItemMixin, RateableMixin, CommentTargetMixin,
+    LikableManagerMixin, FavoriteListItemManagerMixin, DenounceTargetManagerMixin
+)
 from content_interactions_monitoring.mixins import MonitoringMixin
+from content_interactions_leaderboards.mixins import LeaderboardManagerMixin
+
+
+class AManager(LikableManagerMixin, FavoriteListItemManagerMixin, DenounceTargetManagerMixin,
+               LeaderboardManagerMixin, models.Manager):
+    pass
 
 
 @crud_aware
-class A(MonitoringMixin, LikableMixin, DenounceTargetMixin, FavoriteListItemMixin, RateableMixin, models.Model):
+class A(MonitoringMixin, LikableMixin, DenounceTargetMixin, FavoriteListItemMixin, RateableMixin, CommentTargetMixin,
+        models.Model):
     name = models.CharField(max_length=255)
+
+    objects = AManager()
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'social_graph',
     'content_interactions_stats',
     'content_interactions_monitoring',
+    'content_interactions_leaderboards',
     'content_interactions',
     'content_interactions.tests'
 ]
@@ -53,4 +54,6 @@ USE_L10N = True
 ROOT_URLCONF = 'content_interactions.tests.urls'
 
 
-COMMENT_MAX_LENGTH = 3000
\ No newline at end of file
+COMMENT_MAX_LENGTH = 3000
+
+CONTENT_INTERACTIONS_LEADERBOARDS_BACKEND = 'content_interactions_leaderboards.backends.LocMemBackend'
\ No newline at end of file
@@ -144,6 +144,424 @@ class TestContentInteractions(TestCase):
         self.assertEqual(obj_stats.rating_4_count, 1)
         self.assertEqual(obj_stats.rating, 4.0)
 
+    def test_edge_type_registry(self):
+        from content_interactions import LIKE
+        from content_interactions.edge_types import registry
+        like = registry.get(LIKE)
+        self.assertIsNotNone(like)
+        self.assertIs(registry.get(LIKE), like)
+
+        registry.invalidate()
+        self.assertEqual(registry.get(LIKE), like)
+
+        # the missing edge types are not read again
+        from content_interactions.edge_types import EdgeTypeRegistry
+        missing_registry = EdgeTypeRegistry(names=(LIKE, 'missing'))
+        missing_registry.invalidate()
+        self.assertIsNone(missing_registry.get('missing'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(missing_registry.get('missing'))
+            self.assertEqual(missing_registry.get(LIKE), like)
+        missing_registry.invalidate()
+
+    def test_rating_histogram(self):
+        other = User.objects.create_user(username='other', password='pass')
+        self.object.save_rate(self.user, 5)
+        self.object.save_rate(other, 2)
+
+        histogram = self.object.rating_histogram()
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.counts[5], 1)
+        self.assertEqual(histogram.counts[2], 1)
+        self.assertEqual(histogram.sum, 7)
+        self.assertEqual(self.object.avg_rating, 3.5)
+        self.assertEqual(self.object.rating_of_five(), 1)
+
+    def test_interaction_states(self):
+        from models import A
+        other, created = A.objects.get_or_create(name='a2')
+        self.object.like(self.user)
+        self.object.save_rate(self.user, 4)
+        other.mark_as_favorite(self.user)
+
+        states = A.interaction_states(self.user, A.objects.all())
+        self.assertTrue(states[self.object]['liked'])
+        self.assertEqual(states[self.object]['rating'], 4)
+        self.assertFalse(states[self.object]['favorite'])
+        self.assertTrue(states[other]['favorite'])
+        self.assertFalse(states[other]['liked'])
+        self.assertIsNone(states[other]['rating'])
+
+    def test_liked_by_manager(self):
+        from models import A
+        other, created = A.objects.get_or_create(name='a2')
+        A.objects.get_or_create(name='a3')
+        self.object.like(self.user)
+        other.like(self.user)
+
+        liked = list(A.objects.liked_by(self.user))
+        self.assertEqual(liked, [other, self.object])
+        self.assertEqual(list(A.objects.liked_by(self.user, before=(liked[0].edge_time, liked[0].pk))), [self.object])
+
+        # likes made at the same time are paged by pk
+        from social_graph.models import Edge
+        from content_interactions.mixins import like_edge
+        Edge.objects.filter(type=like_edge()).update(time=liked[1].edge_time)
+        liked = list(A.objects.liked_by(self.user))
+        self.assertEqual(liked, [other, self.object])
+        self.assertEqual(list(A.objects.liked_by(self.user, before=(liked[0].edge_time, liked[0].pk))), [self.object])
+        self.assertEqual(A.objects.favorites(self.user).count(), 0)
+
+    def test_iter_liking_users(self):
+        other = User.objects.create_user(username='other', password='pass')
+        self.object.like(self.user)
+        self.object.like(other)
+
+        self.assertEqual(list(self.object.iter_liking_users(chunk_size=1)), [other, self.user])
+        self.assertEqual(list(self.object.iter_liking_users(offset=1, chunk_size=1)), [self.user])
+        self.assertEqual(list(self.object.iter_liking_users(limit=1, resolve=False)), [str(other.pk)])
+
+    def test_interaction_memo(self):
+        from content_interactions.memo import interaction_memo
+        with interaction_memo():
+            self.assertFalse(self.object.liked_by(self.user))
+            self.assertEqual(self.object.likes, 0)
+            self.object.like(self.user)
+            self.assertTrue(self.object.liked_by(self.user))
+            self.assertEqual(self.object.likes, 1)
+            # the repeated lookups are served by the memo
+            with self.assertNumQueries(0):
+                self.assertTrue(self.object.liked_by(self.user))
+                self.assertEqual(self.object.likes, 1)
+
+        # the counts and the edges of the anonymous users don't share a memo key
+        from django.contrib.auth.models import AnonymousUser
+        with interaction_memo():
+            self.assertEqual(self.object.likes, 1)
+            self.assertFalse(self.object.liked_by(AnonymousUser()))
+            self.assertEqual(self.object.likes, 1)
+
+    def test_get_site(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.sites import pinned_site
+        self.assertEqual(self.object.get_site(), Site.objects.get_current())
+
+        other = Site.objects.create(domain='other.example.com', name='other')
+        with pinned_site(other):
+            self.assertEqual(self.object.get_site(), other)
+        self.assertEqual(self.object.get_site(), Site.objects.get_current())
+
+        from content_interactions.sites import get_site
+        self.assertEqual(get_site(other.pk), other)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_site(other.pk), other)
+
+    def test_bulk_like(self):
+        from models import A
+        other = User.objects.create_user(username='other', password='pass')
+        item, created = A.objects.get_or_create(name='a2')
+
+        self.assertEqual(A.bulk_like([(self.user, self.object), (other, self.object), (self.user, item)]), 3)
+        self.assertEqual(A.bulk_like([(self.user, self.object)]), 0)
+        self.assertTrue(self.object.liked_by(other))
+
+        from content_interactions_stats.models import Stats
+        obj_stats = Stats.objects.get(content_type=ContentType.objects.get_for_model(self.object), object_pk=self.object.pk)
+        self.assertEqual(obj_stats.likes, 2)
+
+    def test_toggle_like(self):
+        self.assertEqual(self.object.toggle_like(self.user), (True, 1))
+        self.assertTrue(self.object.liked_by(self.user))
+        self.assertEqual(self.object.toggle_like(self.user), (False, 0))
+        self.assertFalse(self.object.liked_by(self.user))
+
+    def test_leaderboards(self):
+        from models import A
+        from content_interactions_leaderboards.leaderboards import LIKES, RATINGS, RATING_SUMS, AVG_RATINGS
+        for leaderboard in (LIKES, RATINGS, RATING_SUMS, AVG_RATINGS):
+            leaderboard.clear(A)
+        other = User.objects.create_user(username='other', password='pass')
+        item, created = A.objects.get_or_create(name='a2')
+        self.object.like(self.user)
+        item.like(self.user)
+        item.like(other)
+        self.object.save_rate(self.user, 5)
+        item.save_rate(self.user, 3)
+
+        self.assertEqual(A.objects.most_liked(), [item, self.object])
+        self.assertEqual(A.objects.most_liked()[0].leaderboard_score, 2)
+        self.assertEqual(A.objects.most_liked(count=1), [item])
+        self.assertEqual(A.objects.top_rated(), [self.object, item])
+
+    def test_trending(self):
+        from models import A
+        from content_interactions_leaderboards.leaderboards import TRENDING
+        TRENDING.clear(A)
+        item, created = A.objects.get_or_create(name='a2')
+        self.object.like(self.user)
+        c = Client()
+        c.login(username='user', password='pass')
+        c.post(reverse('share_item'), data={
+            'content_type': ContentType.objects.get_for_model(item).pk,
+            'object_pk': item.pk,
+            'addressee': 'suselrd@gmail.com'
+        })
+
+        self.assertEqual(A.objects.trending(), [item, self.object])
+        self.assertAlmostEqual(TRENDING.score(self.object), 1, places=2)
+
+        # an increment after a long pause rescales the scores and the epoch with it
+        import time
+        from content_interactions_leaderboards.leaderboards import get_backend
+        key = TRENDING.key(A)
+        get_backend().set_value('%s:epoch' % key, time.time() - TRENDING.half_life * (TRENDING.rescale_after + 1))
+        TRENDING.increment(item)
+        self.assertAlmostEqual(TRENDING.score(item), 1, places=2)
+        self.assertAlmostEqual(float(get_backend().get_value('%s:epoch' % key)), time.time(), places=-1)
+
+    def test_comment_tree(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.models import Comment
+        site = Site.objects.get_current()
+        first = Comment.objects.create(content_object=self.object, site=site, user=self.user, comment='first')
+        second = Comment.objects.create(content_object=self.object, site=site, user=self.user, comment='second')
+        answer = Comment.objects.create(
+            content_object=self.object, site=site, user=self.user, comment='answer', answer_to=first
+        )
+
+        with self.assertNumQueries(1):
+            tree = Comment.objects.for_model(self.object).tree(self.object)
+            self.assertEqual(tree, [first, second])
+            self.assertEqual(tree[0].thread_answers, [answer])
+            self.assertEqual(tree[0].thread_answers[0].answer_to, first)
+            self.assertEqual(tree[0].thread_answers[0].user, self.user)
+            self.assertEqual(tree[1].thread_answers, [])
+
+    def test_comment_tree_page(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.models import Comment
+        site = Site.objects.get_current()
+        comments = [
+            Comment.objects.create(content_object=self.object, site=site, user=self.user, comment=str(i))
+            for i in range(3)
+        ]
+        answer = Comment.objects.create(
+            content_object=self.object, site=site, user=self.user, comment='answer', answer_to=comments[1]
+        )
+
+        page, cursor = Comment.objects.for_model(self.object).tree_page(size=2)
+        self.assertEqual(page, comments[:2])
+        self.assertEqual(page[1].thread_answers, [answer])
+        page, cursor = Comment.objects.for_model(self.object).tree_page(cursor=cursor, size=2)
+        self.assertEqual(page, comments[2:])
+        self.assertIsNone(cursor)
+        self.assertRaises(ValueError, Comment.objects.for_model(self.object).tree_page, cursor='invalid')
+
+    def test_commenting_users(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.models import Comment
+        self.assertFalse(self.object.commented_by(self.user))
+        self.assertEqual(self.object.commenting_user_pks, frozenset())
+
+        comment = Comment.objects.create(
+            content_object=self.object, site=Site.objects.get_current(), user=self.user, comment='comment'
+        )
+        self.assertTrue(self.object.commented_by(self.user))
+        self.assertEqual(self.object.commenting_users, set([self.user]))
+
+        comment.delete()
+        self.assertFalse(self.object.commented_by(self.user))
+        self.assertEqual(self.object.commenting_user_pks, frozenset())
+
+    def test_comment_delete_cascade(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.models import Comment
+        from content_interactions_stats.models import Stats
+        site = Site.objects.get_current()
+        first = Comment.objects.create(content_object=self.object, site=site, user=self.user, comment='first')
+        answer = Comment.objects.create(
+            content_object=self.object, site=site, user=self.user, comment='answer', answer_to=first
+        )
+        Comment.objects.create(
+            content_object=self.object, site=site, user=self.user, comment='nested', answer_to=answer
+        )
+        second = Comment.objects.create(content_object=self.object, site=site, user=self.user, comment='second')
+
+        first.delete()
+        self.assertEqual(list(Comment.objects.for_model(self.object)), [second])
+        self.assertEqual(Comment._base_manager.filter(is_removed=True).count(), 3)
+        from content_interactions.mixins import author_edge, target_edge, targeted_by_edge
+        graph = Graph()
+        self.assertIsNone(graph.edge_get(self.user, author_edge(), first, site))
+        self.assertIsNone(graph.edge_get(answer, target_edge(), self.object, site))
+        self.assertEqual(graph.edge_count(self.object, targeted_by_edge(), site), 1)
+        self.assertEqual(graph.edge_count(self.user, author_edge(), site), 1)
+        obj_stats = Stats.objects.get(content_type=ContentType.objects.get_for_model(self.object), object_pk=self.object.pk)
+        self.assertEqual(obj_stats.comments, 1)
+
+    def test_import_comments(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.importer import import_comments
+        from content_interactions.models import Comment
+        from content_interactions_stats.models import Stats
+        records = [
+            {'id': 100, 'content_type': 'tests.a', 'object_pk': self.object.pk, 'user': self.user.pk,
+             'comment': 'first', 'submit_date': '2014-01-01T10:00:00'},
+            {'id': 101, 'content_type': 'tests.a', 'object_pk': self.object.pk, 'user': self.user.pk,
+             'comment': 'answer', 'answer_to': 100, 'submit_date': '2014-01-01T11:00:00'},
+        ]
+        self.assertEqual(import_comments(records, chunk_size=1), 2)
+        self.assertEqual(import_comments(records), 0)
+
+        answer = Comment.objects.get(pk=101)
+        self.assertEqual(answer.level, 2)
+        self.assertEqual(answer.object_id, self.object.pk)
+        self.assertEqual(answer.site, Site.objects.get_current())
+        self.assertEqual(answer.user_name, self.user.username)
+        self.assertEqual(answer.submit_date.year, 2014)
+        self.assertEqual(self.object.commenting_user_pks, frozenset([self.user.pk]))
+        obj_stats = Stats.objects.get(content_type=ContentType.objects.get_for_model(self.object), object_pk=self.object.pk)
+        self.assertEqual(obj_stats.comments, 2)
+
+    def test_comment_counter(self):
+        from django.contrib.sites.models import Site
+        from django.core.management import call_command
+        from content_interactions.models import Comment
+        from content_interactions_stats.models import Stats
+        Comment.objects.create(
+            content_object=self.object, site=Site.objects.get_current(), user=self.user, comment='comment'
+        )
+        self.assertEqual(self.object.comments, 1)
+
+        Stats.objects.filter(content_type=ContentType.objects.get_for_model(self.object), object_pk=self.object.pk).update(
+            comments=5
+        )
+        self.assertEqual(self.object.comments, 5)
+        call_command('reconcile_comment_counts', verbosity=0)
+        self.assertEqual(self.object.comments, 1)
+
+    def test_comment_thread_cache(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.models import Comment
+        c = Client()
+        self.assertTrue(c.login(username='user', password='pass'))
+        url = reverse('comment_list', kwargs={
+            'content_type_pk': ContentType.objects.get_for_model(self.object).pk, 'object_pk': self.object.pk
+        })
+        Comment.objects.create(
+            content_object=self.object, site=Site.objects.get_current(), user=self.user, comment='first'
+        )
+        response = c.get(url)
+        self.assertContains(response, 'first')
+        self.assertContains(response, 'data-viewer="%s"' % self.user.pk)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from content_interactions.mixins import bump_comment_thread_version
+        with CaptureQueriesContext(connection) as cached:
+            self.assertContains(c.get(url), 'first')
+        bump_comment_thread_version(
+            ContentType.objects.get_for_model(self.object).pk, self.object.pk, Site.objects.get_current().pk
+        )
+        with CaptureQueriesContext(connection) as rendered:
+            self.assertContains(c.get(url), 'first')
+        # the cached page is served without reading the threads
+        self.assertLess(len(cached), len(rendered))
+
+        Comment.objects.create(
+            content_object=self.object, site=Site.objects.get_current(), user=self.user, comment='second'
+        )
+        self.assertContains(c.get(url), 'second')
+
+    def test_profanity_matcher(self):
+        from content_interactions.profanities import ProfanityMatcher
+        matcher = ProfanityMatcher(['he', 'she', 'hers', 'ass'])
+        self.assertEqual(matcher.find(u'USHERS'), [u'he', u'she', u'hers'])
+        self.assertEqual(matcher.find(u'nothing to see'), [])
+        self.assertEqual(ProfanityMatcher(['ass'], word_boundaries=True).find(u'first class'), [])
+        self.assertEqual(ProfanityMatcher(['ass'], word_boundaries=True).find(u'an ass!'), [u'ass'])
+        self.assertEqual(ProfanityMatcher(['cafe'], normalize=True).find(u'Caf\xe9'), [u'cafe'])
+
+    def test_comment_object_id(self):
+        from django.contrib.sites.models import Site
+        from content_interactions.models import Comment
+        comment = Comment.objects.create(
+            content_object=self.object, site=Site.objects.get_current(), user=self.user, comment='comment'
+        )
+        self.assertEqual(comment.object_id, self.object.pk)
+        self.assertEqual(list(Comment.objects.for_model(self.object)), [comment])
+
+    def test_stats_buffer(self):
+        from content_interactions_stats.buffers import MemoryBuffer
+        from content_interactions_stats.models import Stats
+        content_type = ContentType.objects.get_for_model(self.object)
+        stats_buffer = MemoryBuffer()
+        stats_buffer.add(content_type.pk, self.object.pk, {'visits': 1})
+        stats_buffer.add(content_type.pk, self.object.pk, {'visits': 2, 'likes': 1, 'shares': 0})
+        self.assertEqual(stats_buffer.flush(), 1)
+        self.assertEqual(stats_buffer.flush(), 0)
+
+        obj_stats = Stats.objects.get(content_type=content_type, object_pk=self.object.pk)
+        self.assertEqual((obj_stats.visits, obj_stats.likes, obj_stats.shares), (3, 1, 0))
+
+        # as before the buffer, the decrements don't make the counters of new stats negative
+        from models import A
+        other, created = A.objects.get_or_create(name='a2')
+        Stats.objects.filter(content_type=content_type, object_pk=other.pk).delete()
+        stats_buffer.add(content_type.pk, other.pk, {'likes': -1, 'visits': 1})
+        self.assertEqual(stats_buffer.flush(), 1)
+        other_stats = Stats.objects.get(content_type=content_type, object_pk=other.pk)
+        self.assertEqual((other_stats.likes, other_stats.visits), (0, 1))
+
+        from django.core.exceptions import ImproperlyConfigured
+        # a process local buffer must be flushed by its own process
+        self.assertRaises(ImproperlyConfigured, MemoryBuffer, interval=0)
+
+    def test_stats_queue_buffer(self):
+        from content_interactions_stats.buffers import RedisQueueBuffer
+        from content_interactions_stats.models import Stats
+        content_type = ContentType.objects.get_for_model(self.object)
+        stats_buffer = RedisQueueBuffer(interval=0, max_rows=2)
+        stats_buffer.client.delete(stats_buffer.events_key)
+        for deltas in ({'likes': 1}, {'likes': 1, 'visits': 1}, {'likes': -1}):
+            stats_buffer.add(content_type.pk, self.object.pk, deltas)
+        self.assertEqual(stats_buffer.flush(), 1)
+        obj_stats = Stats.objects.get(content_type=content_type, object_pk=self.object.pk)
+        self.assertEqual((obj_stats.likes, obj_stats.visits), (2, 1))
+
+        self.assertEqual(stats_buffer.flush(), 1)
+        self.assertEqual(stats_buffer.flush(), 0)
+        self.assertEqual(Stats.objects.get(pk=obj_stats.pk).likes, 1)
+
+    def test_upsert_counters(self):
+        from content_interactions_stats.models import Stats
+        from content_interactions_stats.utils import upsert_counters
+        content_type = ContentType.objects.get_for_model(self.object)
+        upsert_counters(self.object.pk, content_type, {'likes': -1, 'visits': 1})
+        upsert_counters(self.object.pk, content_type.pk, {'likes': 2, 'ratings': 2, 'rating_5_count': 1, 'rating_4_count': 1})
+
+        obj_stats = Stats.objects.get(content_type=content_type, object_pk=self.object.pk)
+        self.assertEqual((obj_stats.likes, obj_stats.visits, obj_stats.ratings), (2, 1, 2))
+        self.assertEqual(float(obj_stats.rating), 4.5)
+
+    def test_rebuild_stats(self):
+        from django.core.management import call_command
+        from content_interactions_stats.models import Stats
+        content_type = ContentType.objects.get_for_model(self.object)
+        self.object.like(self.user)
+        self.object.save_rate(self.user, 4)
+        Stats.objects.filter(content_type=content_type, object_pk=self.object.pk).update(
+            likes=5, ratings=0, rating_4_count=0, rating=0
+        )
+
+        call_command(
+            'rebuild_stats', content_types=['%s.%s' % (content_type.app_label, content_type.model)],
+            processes=1, verbosity=0
+        )
+        obj_stats = Stats.objects.get(content_type=content_type, object_pk=self.object.pk)
+        self.assertEqual((obj_stats.likes, obj_stats.ratings, obj_stats.rating_4_count), (1, 1, 1))
+        self.assertEqual(float(obj_stats.rating), 4.0)
+
     def test_stats_property(self):
         self.assertIsNotNone(self.object.stats)
 
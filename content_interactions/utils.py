@@ -1,4 +1,11 @@
 # coding=utf-8
+import base64
+import time
+from contextlib import contextmanager
+from itertools import islice
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_text
 from django.utils.translation import ugettext as _
 
 
@@ -27,4 +34,71 @@ def intmin(value):
             new_value = value / large_number
             tpl = "+%s" if value > large_number else "%s"
             return tpl % converter(new_value) % {'value': new_value}
-    return value
\ No newline at end of file
+    return value
+
+
+@contextmanager
+def cache_lock(key, timeout=10, wait=5, interval=0.02):
+    """
+    Serializes the enclosed block among all the processes sharing the cache, through a lock stored
+    under the given key. If the lock can't be acquired in ``wait`` seconds the block runs anyway.
+    """
+    deadline = time.time() + wait
+    locked = cache.add(key, True, timeout)
+    while not locked and time.time() < deadline:
+        time.sleep(interval)
+        locked = cache.add(key, True, timeout)
+    try:
+        yield locked
+    finally:
+        if locked:
+            cache.delete(key)
+
+
+def batches(entries, batch_size):
+    """
+    Yields the entries in lists of up to ``batch_size``.
+    """
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def send_by_model(signal, counts, values=None):
+    """
+    Sends the signal once per model of the items of the {item: count} counts, with the counts (and the
+    {item: values} values, if passed) of the items of that model.
+    """
+    models = {}
+    for item in counts:
+        models.setdefault(item.__class__, []).append(item)
+    for model, items in models.items():
+        kwargs = {'counts': dict((item, counts[item]) for item in items)}
+        if values is not None:
+            kwargs['values'] = dict((item, values[item]) for item in items)
+        signal.send(sender=model, **kwargs)
+
+
+def encode_cursor(submit_date, pk):
+    """
+    Encodes a (submit_date, pk) position of a comment listing as an url safe string.
+    """
+    return force_text(base64.urlsafe_b64encode(force_bytes('%s|%s' % (submit_date.isoformat(), pk))))
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor made by ``encode_cursor``. Raises ValueError if it is not a valid one.
+    """
+    try:
+        submit_date, pk = force_text(base64.urlsafe_b64decode(force_bytes(cursor))).split('|')
+        submit_date = parse_datetime(submit_date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError(u"Invalid cursor: %r" % cursor)
+    if submit_date is None:
+        raise ValueError(u"Invalid cursor: %r" % cursor)
+    return submit_date, pk
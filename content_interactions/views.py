@@ -4,15 +4,18 @@ import logging
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, Http404
 from django.utils.datastructures import MultiValueDictKeyError
 from django.utils.encoding import force_text
+from django.utils.http import urlencode
 from django.utils.module_loading import import_by_path
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import View, FormView, CreateView, UpdateView, DeleteView, ListView
 from django.contrib.sites.models import Site
 from forms import ShareForm, RateForm, DenounceForm, CommentForm
-from utils import intmin
+from mixins import comment_thread_version, bump_comment_thread_version
+from utils import intmin, decode_cursor
 from models import Comment
 
 logger = logging.getLogger(__name__)
@@ -59,16 +62,8 @@ class LikeView(JSONResponseMixin, View):
             pk = request.POST['pk']
             instance = model.objects.get(pk=pk)
 
-            if instance.liked_by(request.user):
-                instance.unlike(request.user)
-                tooltip = _(u"Like")
-                toggle_status = False
-            else:
-                instance.like(request.user)
-                tooltip = _(u"Unlike")
-                toggle_status = True
-
-            likes = instance.likes
+            toggle_status, likes = instance.toggle_like(request.user)
+            tooltip = _(u"Unlike") if toggle_status else _(u"Like")
 
             return self.render_to_response({
                 'result': True,
@@ -97,16 +92,8 @@ class FavoriteView(JSONResponseMixin, View):
             pk = request.POST['pk']
             instance = model.objects.get(pk=pk)
 
-            if instance.favorite_of(request.user):
-                instance.delete_favorite(request.user)
-                tooltip = _(u"Mark as Favorite")
-                toggle_status = True
-            else:
-                instance.mark_as_favorite(request.user)
-                tooltip = _(u"Not my Favorite")
-                toggle_status = True
-
-            favorite_marks = instance.favorite_marks
+            toggle_status, favorite_marks = instance.toggle_favorite(request.user)
+            tooltip = _(u"Not my Favorite") if toggle_status else _(u"Mark as Favorite")
 
             return self.render_to_response({
                 'result': True,
@@ -301,16 +288,110 @@ class CommentUpdateView(CommentViewMixin,UpdateView):
     def _get_model_str(self):
         return self.get_object().content_object._meta.model_name
 
+    def form_valid(self, form):
+        response = super(CommentUpdateView, self).form_valid(form)
+        bump_comment_thread_version(self.object.content_type_id, self.object.object_pk, self.object.site_id)
+        return response
+
+
+class CommentPage(object):
+    """
+    A page of comment threads, loaded on first use, so nothing is read when the page is served from
+    the fragment cache.
+    """
+
+    def __init__(self, queryset, cursor, size, content_object):
+        self.queryset = queryset
+        self.cursor = cursor
+        self.size = size
+        self.content_object = content_object
+        self._comments = None
+        self._next_cursor = None
+
+    def _load(self):
+        if self._comments is None:
+            self._comments, self._next_cursor = self.queryset.tree_page(
+                cursor=self.cursor, size=self.size, content_object=self.content_object
+            )
+        return self._comments
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+    @property
+    def next_cursor(self):
+        self._load()
+        return self._next_cursor
+
 
 class CommentListView(ListView):
+    """
+    Lists the comments of an object by pages of COMMENT_PAGE_SIZE threads. The next page is requested
+    with the 'cursor' given by the previous one (as 'next_page_url' in the context).
+
+    The threads are rendered without user specific parts, so the template can cache them, keyed by
+    the site, the language, the thread version (bumped on every comment change) and cursor. The edit
+    and delete links of the viewer are shown over the cached fragment, from the 'viewer_pk' and
+    'viewer_is_manager' context.
+    """
     model = Comment
     context_object_name = 'comments'
     content_object = None
+    cursor = None
 
     def get_queryset(self):
         content_type = ContentType.objects.get_for_id(self.kwargs.get('content_type_pk'))
         self.content_object = content_type.get_object_for_this_type(pk=self.kwargs.get('object_pk'))
-        return self.model.on_site.for_model(self.content_object).first_level()
+        self.cursor = self.request.GET.get('cursor') or None
+        if self.cursor is not None:
+            try:
+                decode_cursor(self.cursor)
+            except ValueError:
+                raise Http404(_(u"Invalid cursor."))
+        return CommentPage(
+            self.model.on_site.for_model(self.content_object),
+            self.cursor,
+            self.paginate_by or settings.COMMENT_PAGE_SIZE,
+            self.content_object
+        )
+
+    def get_paginate_by(self, queryset):
+        # the page is cut by the queryset itself, see ``CommentQuerySet.tree_page``
+        return None
+
+    def get_context_data(self, **kwargs):
+        from django.contrib.auth.models import User
+
+        context = super(CommentListView, self).get_context_data(**kwargs)
+        content_type_pk = ContentType.objects.get_for_model(self.content_object).pk
+        user = self.request.user
+        comments_manager = self.content_object.get_comments_manager()
+        context.update({
+            'content_object': self.content_object,
+            'content_type_pk': content_type_pk,
+            'comment_count': self.content_object.comments,
+            'cursor': self.cursor or '',
+            # the threads are read from 'Comment.on_site', the comments of the SITE_ID site
+            'site_pk': settings.SITE_ID,
+            'thread_version': comment_thread_version(content_type_pk, self.content_object.pk, settings.SITE_ID),
+            'thread_cache_timeout': settings.COMMENT_THREAD_CACHE_TIMEOUT,
+            'next_page_url': self.next_page_url,
+            'viewer_pk': user.pk if user.is_authenticated() else '',
+            'viewer_is_manager': (
+                user.is_authenticated() and isinstance(comments_manager, User) and comments_manager.pk == user.pk
+            ),
+        })
+        return context
+
+    def next_page_url(self):
+        next_cursor = self.object_list.next_cursor
+        return "%s?%s" % (self.request.path, urlencode({'cursor': next_cursor})) if next_cursor else None
 
     def get_template_names(self):
         names = super(CommentListView, self).get_template_names()
@@ -0,0 +1,238 @@
+# coding=utf-8
+import threading
+
+
+class BaseBackend(object):
+    """
+    Storage of sorted sets of scored members.
+    """
+
+    def increment(self, key, member, amount):
+        """
+        Adds ``amount`` to the score of ``member`` in the set ``key``, and returns the new score.
+        """
+        raise NotImplementedError
+
+    def increment_average(self, sum_key, count_key, average_key, member, sum_amount, count_amount):
+        """
+        Atomically adds ``sum_amount`` and ``count_amount`` to the scores of ``member`` in the sets
+        ``sum_key`` and ``count_key``, and sets its score in ``average_key`` to their quotient.
+        """
+        raise NotImplementedError
+
+    def increment_trending(self, key, epoch_key, member, amount, now, half_life, rescale_after):
+        """
+        Atomically adds ``amount`` weighted by 2 ** ((now - epoch) / half_life) to the score of ``member``
+        in the set ``key``, where the epoch is the value of ``epoch_key`` (set to ``now`` if it isn't set).
+        If the weight is more than ``rescale_after`` half lives big, the scores of the set are scaled down
+        by it and the epoch is moved to ``now`` first. Returns the new score.
+        """
+        raise NotImplementedError
+
+    def set(self, key, member, score):
+        raise NotImplementedError
+
+    def score(self, key, member):
+        raise NotImplementedError
+
+    def remove(self, key, member):
+        raise NotImplementedError
+
+    def top(self, key, count, offset=0):
+        """
+        Returns the (member, score) tuples of the set ``key`` with the highest scores, highest first.
+        """
+        raise NotImplementedError
+
+    def members(self, key):
+        raise NotImplementedError
+
+    def clear(self, key):
+        raise NotImplementedError
+
+    def scale(self, key, factor):
+        """
+        Multiplies all the scores in the set ``key`` by ``factor``.
+        """
+        raise NotImplementedError
+
+    def get_value(self, key):
+        raise NotImplementedError
+
+    def set_value(self, key, value):
+        raise NotImplementedError
+
+    def add_value(self, key, value):
+        """
+        Sets ``key`` to ``value`` only if it isn't set yet.
+        """
+        raise NotImplementedError
+
+
+# the sum, count and average are updated in one script, so concurrent updates can't leave a stale average
+INCREMENT_AVERAGE_SCRIPT = """
+local total = tonumber(redis.call('ZINCRBY', KEYS[1], ARGV[2], ARGV[1]))
+local count = tonumber(redis.call('ZINCRBY', KEYS[2], ARGV[3], ARGV[1]))
+local average = 0
+if count ~= 0 then
+    average = total / count
+end
+redis.call('ZADD', KEYS[3], average, ARGV[1])
+"""
+
+# the epoch is read, moved and used to weight the increment in one script, so no increment is weighted by an
+# epoch that a concurrent rescale has already moved
+INCREMENT_TRENDING_SCRIPT = """
+local now = tonumber(ARGV[3])
+local half_life = tonumber(ARGV[4])
+local epoch = tonumber(redis.call('GET', KEYS[2]))
+if epoch == nil then
+    epoch = now
+    redis.call('SET', KEYS[2], ARGV[3])
+end
+if (now - epoch) / half_life > tonumber(ARGV[5]) then
+    redis.call('ZUNIONSTORE', KEYS[1], 1, KEYS[1], 'WEIGHTS', tostring(2 ^ (-(now - epoch) / half_life)))
+    redis.call('SET', KEYS[2], ARGV[3])
+    epoch = now
+end
+return redis.call('ZINCRBY', KEYS[1], tostring(tonumber(ARGV[2]) * 2 ^ ((now - epoch) / half_life)), ARGV[1])
+"""
+
+
+class RedisBackend(BaseBackend):
+    """
+    Keeps each leaderboard in a redis sorted set.
+    """
+
+    def __init__(self):
+        import redis
+        from settings import CONTENT_INTERACTIONS_LEADERBOARDS_REDIS_URL
+        self.client = redis.StrictRedis.from_url(CONTENT_INTERACTIONS_LEADERBOARDS_REDIS_URL)
+        self._increment_average = self.client.register_script(INCREMENT_AVERAGE_SCRIPT)
+        self._increment_trending = self.client.register_script(INCREMENT_TRENDING_SCRIPT)
+
+    def increment(self, key, member, amount):
+        return float(self.client.execute_command('ZINCRBY', key, amount, member))
+
+    def increment_average(self, sum_key, count_key, average_key, member, sum_amount, count_amount):
+        self._increment_average(keys=[sum_key, count_key, average_key], args=[member, sum_amount, count_amount])
+
+    def increment_trending(self, key, epoch_key, member, amount, now, half_life, rescale_after):
+        return float(self._increment_trending(
+            keys=[key, epoch_key], args=[member, amount, repr(now), half_life, rescale_after]
+        ))
+
+    def set(self, key, member, score):
+        self.client.execute_command('ZADD', key, score, member)
+
+    def score(self, key, member):
+        return self.client.zscore(key, member)
+
+    def remove(self, key, member):
+        self.client.zrem(key, member)
+
+    def top(self, key, count, offset=0):
+        return [
+            (member.decode('utf-8') if isinstance(member, bytes) else member, score)
+            for member, score in self.client.zrevrange(key, offset, offset + count - 1, withscores=True)
+        ]
+
+    def members(self, key):
+        return [
+            member.decode('utf-8') if isinstance(member, bytes) else member
+            for member in self.client.zrange(key, 0, -1)
+        ]
+
+    def clear(self, key):
+        self.client.delete(key)
+
+    def scale(self, key, factor):
+        # server side, in one command, so no concurrent increment is lost or overwritten
+        self.client.zunionstore(key, {key: factor})
+
+    def get_value(self, key):
+        return self.client.get(key)
+
+    def set_value(self, key, value):
+        self.client.set(key, value)
+
+    def add_value(self, key, value):
+        self.client.setnx(key, value)
+
+
+class LocMemBackend(BaseBackend):
+    """
+    Keeps the leaderboards in process memory. Meant for tests and development only.
+    """
+
+    def __init__(self):
+        self._sets = {}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def increment(self, key, member, amount):
+        with self._lock:
+            scores = self._sets.setdefault(key, {})
+            scores[member] = scores.get(member, 0) + amount
+            return float(scores[member])
+
+    def increment_average(self, sum_key, count_key, average_key, member, sum_amount, count_amount):
+        with self._lock:
+            sums = self._sets.setdefault(sum_key, {})
+            counts = self._sets.setdefault(count_key, {})
+            sums[member] = sums.get(member, 0) + sum_amount
+            counts[member] = counts.get(member, 0) + count_amount
+            self._sets.setdefault(average_key, {})[member] = (
+                sums[member]/float(counts[member]) if counts[member] else 0
+            )
+
+    def increment_trending(self, key, epoch_key, member, amount, now, half_life, rescale_after):
+        with self._lock:
+            epoch = float(self._values.setdefault(epoch_key, now))
+            scores = self._sets.setdefault(key, {})
+            if (now - epoch)/half_life > rescale_after:
+                factor = 2 ** -((now - epoch)/half_life)
+                for scored in scores:
+                    scores[scored] *= factor
+                self._values[epoch_key] = epoch = now
+            scores[member] = scores.get(member, 0) + amount * 2 ** ((now - epoch)/half_life)
+            return float(scores[member])
+
+    def set(self, key, member, score):
+        with self._lock:
+            self._sets.setdefault(key, {})[member] = score
+
+    def score(self, key, member):
+        score = self._sets.get(key, {}).get(member)
+        return float(score) if score is not None else None
+
+    def remove(self, key, member):
+        with self._lock:
+            self._sets.get(key, {}).pop(member, None)
+
+    def top(self, key, count, offset=0):
+        scores = sorted(self._sets.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return [(member, float(score)) for member, score in scores[offset:offset + count]]
+
+    def members(self, key):
+        return list(self._sets.get(key, {}).keys())
+
+    def clear(self, key):
+        with self._lock:
+            self._sets.pop(key, None)
+
+    def scale(self, key, factor):
+        with self._lock:
+            scores = self._sets.get(key, {})
+            for member in scores:
+                scores[member] *= factor
+
+    def get_value(self, key):
+        return self._values.get(key)
+
+    def set_value(self, key, value):
+        self._values[key] = value
+
+    def add_value(self, key, value):
+        with self._lock:
+            self._values.setdefault(key, value)
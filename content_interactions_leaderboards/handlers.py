@@ -0,0 +1,66 @@
+# coding=utf-8
+from leaderboards import LIKES, FAVORITE_MARKS, TRENDING, record_ratings
+
+
+# noinspection PyUnusedLocal
+def like_handler(instance, **kwargs):
+    LIKES.increment(instance, 1)
+
+
+# noinspection PyUnusedLocal
+def dislike_handler(instance, **kwargs):
+    LIKES.increment(instance, -1)
+
+
+# noinspection PyUnusedLocal
+def bulk_like_handler(sender, counts, **kwargs):
+    for instance, count in counts.items():
+        LIKES.increment(instance, count)
+
+
+# noinspection PyUnusedLocal
+def favorite_mark_handler(instance, **kwargs):
+    FAVORITE_MARKS.increment(instance, 1)
+
+
+# noinspection PyUnusedLocal
+def favorite_unmark_handler(instance, **kwargs):
+    FAVORITE_MARKS.increment(instance, -1)
+
+
+# noinspection PyUnusedLocal
+def bulk_favorite_mark_handler(sender, counts, **kwargs):
+    for instance, count in counts.items():
+        FAVORITE_MARKS.increment(instance, count)
+
+
+# noinspection PyUnusedLocal
+def new_rating_handler(instance, rating, **kwargs):
+    record_ratings(instance, rating, 1)
+
+
+# noinspection PyUnusedLocal
+def updated_rating_handler(instance, rating, old_rating, **kwargs):
+    if old_rating is None:
+        record_ratings(instance, rating, 1)
+    else:
+        record_ratings(instance, rating - old_rating, 0)
+
+
+# noinspection PyUnusedLocal
+def bulk_rating_handler(sender, counts, values, **kwargs):
+    for instance, count in counts.items():
+        record_ratings(
+            instance, sum(rating * delta for rating, delta in values.get(instance, {}).items()), count
+        )
+
+
+def trending_handler(weight, comment=False):
+    """
+    Returns a handler that adds ``weight`` to the trending score of the signal instance (or of the
+    commented item, if ``comment`` is True).
+    """
+    # noinspection PyUnusedLocal
+    def handler(instance, **kwargs):
+        TRENDING.increment(instance.content_object if comment else instance, weight)
+    return handler
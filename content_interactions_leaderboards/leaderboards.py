@@ -0,0 +1,130 @@
+# coding=utf-8
+import time
+from django.contrib.contenttypes.models import ContentType
+from django.utils.encoding import force_text
+from django.utils.module_loading import import_by_path
+from content_interactions.sites import get_current_site
+from settings import (
+    CONTENT_INTERACTIONS_LEADERBOARDS_BACKEND,
+    CONTENT_INTERACTIONS_LEADERBOARDS_KEY_PREFIX,
+    CONTENT_INTERACTIONS_TRENDING_HALF_LIFE,
+)
+
+_backend = []
+
+
+def get_backend():
+    if not _backend:
+        _backend.append(import_by_path(CONTENT_INTERACTIONS_LEADERBOARDS_BACKEND)())
+    return _backend[0]
+
+
+def get_site(instance):
+    return instance.get_site() if hasattr(instance, 'get_site') else get_current_site()
+
+
+class Leaderboard(object):
+    """
+    A score per item, kept in one sorted set per site and content type.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def key(self, model, site=None):
+        return '%s:%s:%s:%s' % (
+            CONTENT_INTERACTIONS_LEADERBOARDS_KEY_PREFIX,
+            self.name,
+            (site or get_current_site()).pk,
+            ContentType.objects.get_for_model(model).pk
+        )
+
+    def increment(self, instance, amount=1):
+        return get_backend().increment(self.key(instance, get_site(instance)), force_text(instance.pk), amount)
+
+    def set_score(self, instance, score):
+        get_backend().set(self.key(instance, get_site(instance)), force_text(instance.pk), score)
+
+    def score(self, instance):
+        return get_backend().score(self.key(instance, get_site(instance)), force_text(instance.pk))
+
+    def remove(self, instance):
+        get_backend().remove(self.key(instance, get_site(instance)), force_text(instance.pk))
+
+    def top(self, model, count=50, site=None, offset=0):
+        """
+        Returns the (pk, score) tuples of the ``count`` items of the passed model with the highest scores,
+        highest first.
+        """
+        return get_backend().top(self.key(model, site), count, offset)
+
+    def clear(self, model, site=None):
+        get_backend().clear(self.key(model, site))
+
+
+class TrendingLeaderboard(Leaderboard):
+    """
+    A leaderboard whose scores decay exponentially with time, halving every ``half_life`` seconds.
+
+    Instead of decaying every score as time goes by, each new event is weighted up by
+    2 ** ((now - epoch) / half_life), which keeps the order of the items, so one increment per event is
+    enough. The epoch of each sorted set is moved forward, scaling its scores down, once the weights get
+    ``rescale_after`` half lives big. The backend does both atomically with the increment, so no event is
+    weighted by an epoch that has already been moved.
+    """
+
+    def __init__(self, name, half_life, rescale_after=512):
+        super(TrendingLeaderboard, self).__init__(name)
+        self.half_life = float(half_life)
+        self.rescale_after = rescale_after
+
+    def increment(self, instance, amount=1):
+        key = self.key(instance, get_site(instance))
+        return get_backend().increment_trending(
+            key, '%s:epoch' % key, force_text(instance.pk), amount, time.time(), self.half_life, self.rescale_after
+        )
+
+    def score(self, instance):
+        key = self.key(instance, get_site(instance))
+        score = get_backend().score(key, force_text(instance.pk))
+        return score * self._decay(key) if score is not None else None
+
+    def top(self, model, count=50, site=None, offset=0):
+        """
+        Returns the (pk, score) tuples of the ``count`` items of the passed model with the highest scores,
+        highest first, with the scores decayed to the current time.
+        """
+        key = self.key(model, site)
+        decay = self._decay(key)
+        return [(pk, score * decay) for pk, score in get_backend().top(key, count, offset)]
+
+    def _decay(self, key):
+        now = time.time()
+        return 2 ** -((now - self._epoch(key, now))/self.half_life)
+
+    def _epoch(self, key, now):
+        epoch = get_backend().get_value('%s:epoch' % key)
+        if epoch is None:
+            get_backend().add_value('%s:epoch' % key, now)
+            epoch = get_backend().get_value('%s:epoch' % key)
+        return float(epoch)
+
+
+LIKES = Leaderboard('likes')
+FAVORITE_MARKS = Leaderboard('favorite_marks')
+RATINGS = Leaderboard('ratings')
+RATING_SUMS = Leaderboard('rating_sums')
+AVG_RATINGS = Leaderboard('avg_ratings')
+TRENDING = TrendingLeaderboard('trending', CONTENT_INTERACTIONS_TRENDING_HALF_LIFE)
+
+
+def record_ratings(instance, rating_sum, ratings):
+    """
+    Adds ``rating_sum`` and ``ratings`` to the sum and count of ratings of the item, and updates its
+    average rating from them, in one atomic step.
+    """
+    site = get_site(instance)
+    get_backend().increment_average(
+        RATING_SUMS.key(instance, site), RATINGS.key(instance, site), AVG_RATINGS.key(instance, site),
+        force_text(instance.pk), rating_sum, ratings
+    )
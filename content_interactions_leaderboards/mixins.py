@@ -0,0 +1,35 @@
+# coding=utf-8
+from django.utils.encoding import force_text
+from leaderboards import LIKES, FAVORITE_MARKS, AVG_RATINGS, TRENDING
+
+
+class LeaderboardManagerMixin(object):
+
+    def leaderboard(self, leaderboard, count=50, site=None, offset=0):
+        """
+        Returns the ``count`` items with the highest scores in the passed leaderboard, highest first, each
+        one with its score as ``leaderboard_score``.
+        """
+        top = leaderboard.top(self.model, count, site, offset)
+        objects = dict(
+            (force_text(pk), obj) for pk, obj in self.get_queryset().in_bulk([pk for pk, score in top]).items()
+        )
+        result = []
+        for pk, score in top:
+            obj = objects.get(pk)
+            if obj is not None:
+                obj.leaderboard_score = score
+                result.append(obj)
+        return result
+
+    def most_liked(self, count=50, site=None, offset=0):
+        return self.leaderboard(LIKES, count, site, offset)
+
+    def most_favorite(self, count=50, site=None, offset=0):
+        return self.leaderboard(FAVORITE_MARKS, count, site, offset)
+
+    def top_rated(self, count=50, site=None, offset=0):
+        return self.leaderboard(AVG_RATINGS, count, site, offset)
+
+    def trending(self, count=50, site=None, offset=0):
+        return self.leaderboard(TRENDING, count, site, offset)
@@ -0,0 +1,14 @@
+# coding=utf-8
+from django.utils.module_loading import import_by_path
+
+
+def load_processors():
+    from settings import CONTENT_INTERACTIONS_LEADERBOARDS_PROCESSORS
+    from processors import BaseProcessor
+    for processor in CONTENT_INTERACTIONS_LEADERBOARDS_PROCESSORS:
+        processor_class = import_by_path(processor)
+        if not issubclass(processor_class, BaseProcessor):
+            continue
+        processor_class()
+
+load_processors()
@@ -0,0 +1,85 @@
+# coding=utf-8
+from social_graph.signals import object_visited
+from content_interactions.signals import (
+    item_liked,
+    item_disliked,
+    items_liked,
+    item_marked_as_favorite,
+    item_unmarked_as_favorite,
+    items_marked_as_favorite,
+    item_rated,
+    item_rate_modified,
+    items_rated,
+    item_shared,
+    item_commented,
+)
+from settings import CONTENT_INTERACTIONS_TRENDING_WEIGHTS
+from handlers import (
+    like_handler,
+    dislike_handler,
+    bulk_like_handler,
+    favorite_mark_handler,
+    favorite_unmark_handler,
+    bulk_favorite_mark_handler,
+    new_rating_handler,
+    updated_rating_handler,
+    bulk_rating_handler,
+    trending_handler,
+)
+
+
+class BaseProcessor(object):
+    handlers = None
+
+    def __init__(self):
+        super(BaseProcessor, self).__init__()
+        handlers = self.get_handlers()
+        if handlers:
+            for handler_code, signal, handler in handlers:
+                signal.connect(handler, dispatch_uid='%s_leaderboard' % handler_code, weak=False)
+
+    def get_handlers(self):
+        return self.handlers
+
+
+class Likes(BaseProcessor):
+    handlers = (
+        ('item_liked', item_liked, like_handler),
+        ('item_disliked', item_disliked, dislike_handler),
+        ('items_liked', items_liked, bulk_like_handler),
+    )
+
+
+class FavoriteMarks(BaseProcessor):
+    handlers = (
+        ('item_marked_favorite', item_marked_as_favorite, favorite_mark_handler),
+        ('item_unmarked_favorite', item_unmarked_as_favorite, favorite_unmark_handler),
+        ('items_marked_favorite', items_marked_as_favorite, bulk_favorite_mark_handler),
+    )
+
+
+class Ratings(BaseProcessor):
+    handlers = (
+        ('item_rated', item_rated, new_rating_handler),
+        ('item_rate_modified', item_rate_modified, updated_rating_handler),
+        ('items_rated', items_rated, bulk_rating_handler),
+    )
+
+
+class Trending(BaseProcessor):
+    signals = (
+        ('item_liked', item_liked),
+        ('item_commented', item_commented),
+        ('item_shared', item_shared),
+        ('object_visited', object_visited),
+    )
+
+    def get_handlers(self):
+        return [
+            (
+                '%s_trending' % name,
+                signal,
+                trending_handler(CONTENT_INTERACTIONS_TRENDING_WEIGHTS[name], comment=(name == 'item_commented'))
+            )
+            for name, signal in self.signals if CONTENT_INTERACTIONS_TRENDING_WEIGHTS.get(name)
+        ]
@@ -0,0 +1,32 @@
+# coding=utf-8
+from django.conf import settings
+
+CONTENT_INTERACTIONS_LEADERBOARDS_PROCESSORS = getattr(settings, 'CONTENT_INTERACTIONS_LEADERBOARDS_PROCESSORS', (
+    'content_interactions_leaderboards.processors.Likes',
+    'content_interactions_leaderboards.processors.FavoriteMarks',
+    'content_interactions_leaderboards.processors.Ratings',
+    'content_interactions_leaderboards.processors.Trending',
+))
+
+CONTENT_INTERACTIONS_LEADERBOARDS_BACKEND = getattr(
+    settings, 'CONTENT_INTERACTIONS_LEADERBOARDS_BACKEND', 'content_interactions_leaderboards.backends.RedisBackend'
+)
+
+CONTENT_INTERACTIONS_LEADERBOARDS_REDIS_URL = getattr(
+    settings, 'CONTENT_INTERACTIONS_LEADERBOARDS_REDIS_URL', 'redis://localhost:6379/0'
+)
+
+CONTENT_INTERACTIONS_LEADERBOARDS_KEY_PREFIX = getattr(
+    settings, 'CONTENT_INTERACTIONS_LEADERBOARDS_KEY_PREFIX', 'content_interactions_leaderboards'
+)
+
+# seconds it takes for the trending score of an item to decay to half
+CONTENT_INTERACTIONS_TRENDING_HALF_LIFE = getattr(settings, 'CONTENT_INTERACTIONS_TRENDING_HALF_LIFE', 60*60*24)
+
+# weight of each signal in the trending score
+CONTENT_INTERACTIONS_TRENDING_WEIGHTS = getattr(settings, 'CONTENT_INTERACTIONS_TRENDING_WEIGHTS', {
+    'item_liked': 1,
+    'item_commented': 2,
+    'item_shared': 3,
+    'object_visited': 0.1,
+})
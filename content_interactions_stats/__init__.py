@@ -1,7 +1,8 @@
 # coding=utf-8
 from django.contrib.contenttypes.models import ContentType
 from content_interactions.mixins import (
-    ContentInteractionMixin, LikableMixin, FavoriteListItemMixin, DenounceTargetMixin, RateableMixin
+    ContentInteractionMixin, LikableMixin, FavoriteListItemMixin, DenounceTargetMixin, RateableMixin,
+    CommentTargetMixin
 )
 from settings import *
 
@@ -19,17 +20,37 @@ def stats(self):
     if hasattr(result, 'favorite_marks') and isinstance(self, FavoriteListItemMixin):
         result.favorite_marks = self.favorite_marks
     if hasattr(result, 'ratings') and isinstance(self, RateableMixin):
-        result.ratings = self.ratings
-        result.rating_5_count = self.rating_of(5)
-        result.rating_4_count = self.rating_of(4)
-        result.rating_3_count = self.rating_of(3)
-        result.rating_2_count = self.rating_of(2)
-        result.rating_1_count = self.rating_of(1)
-        result.rating = self.avg_rating
+        histogram = self.rating_histogram()
+        result.ratings = histogram.count
+        result.rating_5_count = histogram.counts[5]
+        result.rating_4_count = histogram.counts[4]
+        result.rating_3_count = histogram.counts[3]
+        result.rating_2_count = histogram.counts[2]
+        result.rating_1_count = histogram.counts[1]
+        result.rating = histogram.mean
     if hasattr(result, 'denounces') and isinstance(self, DenounceTargetMixin):
         result.denounces = self.denounces
+    if hasattr(result, 'comments') and isinstance(self, CommentTargetMixin):
+        result.comments = self.comment_list.count()
     result.save()
     return result
 
 
+_cached_comments = CommentTargetMixin.comments
+
+
+@property
+def comments(self):
+    from content_interactions_stats.models import Stats
+    if 'comments' in Stats._meta.get_all_field_names():
+        # read only the counter, without creating the stats of the object
+        counts = list(Stats.objects.filter(
+            content_type=ContentType.objects.get_for_model(self.__class__), object_pk=self.pk
+        ).values_list('comments', flat=True)[:1])
+        if counts:
+            return counts[0]
+    return _cached_comments.fget(self)
+
+
 setattr(ContentInteractionMixin, 'stats', stats)
+setattr(CommentTargetMixin, 'comments', comments)
@@ -0,0 +1,231 @@
+# coding=utf-8
+"""
+Write-coalescing buffers of stats counter deltas.
+
+When CONTENT_INTERACTIONS_STATS_BUFFER is set, the stats handlers add their deltas to a buffer instead
+of updating the stats rows, and the buffer adds up the deltas per (content type, object, counter) and
+writes them every CONTENT_INTERACTIONS_STATS_BUFFER_FLUSH_INTERVAL seconds, with one UPDATE per row.
+The buffer is also flushed when it holds CONTENT_INTERACTIONS_STATS_BUFFER_MAX_ROWS rows, and when the
+process exits.
+
+The buffer sets the durability: ``MemoryBuffer`` keeps the deltas in the process, so a process that
+dies without exiting cleanly loses up to one interval of them; ``RedisBuffer`` and ``RedisQueueBuffer``
+keep them in redis, shared by all the processes, so they survive the processes.
+
+The shared buffers can be flushed by the celery workers instead: with
+CONTENT_INTERACTIONS_STATS_BUFFER_FLUSH_INTERVAL set to 0 the processes only add events to the buffer,
+and the periodic 'content_interactions.flush_stats_buffer' task (to be scheduled with celery beat)
+drains it.
+"""
+import atexit
+import logging
+import threading
+import time
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_by_path
+from settings import (
+    CONTENT_INTERACTIONS_STATS_BUFFER,
+    CONTENT_INTERACTIONS_STATS_BUFFER_FLUSH_INTERVAL,
+    CONTENT_INTERACTIONS_STATS_BUFFER_MAX_ROWS,
+    CONTENT_INTERACTIONS_STATS_BUFFER_REDIS_URL,
+    CONTENT_INTERACTIONS_STATS_BUFFER_KEY_PREFIX,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BaseBuffer(object):
+    # whether the buffer is shared by all the processes, so it can be flushed by another one
+    shared = False
+
+    def __init__(self, interval=None, max_rows=None):
+        self.interval = CONTENT_INTERACTIONS_STATS_BUFFER_FLUSH_INTERVAL if interval is None else interval
+        self.max_rows = max_rows or CONTENT_INTERACTIONS_STATS_BUFFER_MAX_ROWS
+        if not self.interval and not self.shared:
+            raise ImproperlyConfigured(
+                "%s is flushed by its own process only, so it needs a CONTENT_INTERACTIONS_STATS_BUFFER_FLUSH_INTERVAL."
+                % self.__class__.__name__
+            )
+        self._timer = None
+        self._timer_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, content_type_id, object_pk, deltas):
+        """
+        Adds the passed {counter: delta} deltas to the ones buffered for the object.
+        """
+        deltas = dict((field, delta) for field, delta in deltas.items() if delta)
+        if not deltas:
+            return
+        rows = self.push(content_type_id, object_pk, deltas)
+        if not self.interval:
+            # flushed by the periodic task
+            return
+        self._start_timer()
+        if rows >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered deltas, with one statement per stats row, all in one transaction. Returns the
+        number of rows written.
+        """
+        from utils import items_counters_process
+        rows = self.pop()
+        by_content_type = {}
+        for (content_type_id, object_pk), deltas in rows.items():
+            by_content_type.setdefault(content_type_id, []).append((object_pk, deltas))
+        try:
+            with transaction.atomic():
+                for content_type_id, items in by_content_type.items():
+                    items_counters_process(content_type_id, items)
+        except Exception:
+            logger.exception(u"Error writing the buffered stats, they are kept for the next flush.")
+            for (content_type_id, object_pk), deltas in rows.items():
+                self.push(content_type_id, object_pk, deltas)
+            return 0
+        return len(rows)
+
+    def push(self, content_type_id, object_pk, deltas):
+        """
+        Adds the deltas of an object to the buffer, and returns the number of rows buffered.
+        """
+        raise NotImplementedError
+
+    def pop(self):
+        """
+        Takes the buffered deltas (up to ``max_rows`` rows, for shared buffers) out of the buffer, as a
+        {(content type id, object pk): deltas} dict.
+        """
+        raise NotImplementedError
+
+    def _start_timer(self):
+        # started on first use, so each (forked) process gets its own flushing thread
+        if self._timer is not None and self._timer.is_alive():
+            return
+        with self._timer_lock:
+            if self._timer is None or not self._timer.is_alive():
+                self._timer = threading.Thread(target=self._run_timer, name='stats-buffer-flush')
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(u"Error flushing the stats buffer.")
+
+
+class MemoryBuffer(BaseBuffer):
+    """
+    Keeps the deltas in the memory of the process.
+    """
+
+    def __init__(self, interval=None, max_rows=None):
+        super(MemoryBuffer, self).__init__(interval, max_rows)
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def push(self, content_type_id, object_pk, deltas):
+        with self._lock:
+            row = self._rows.setdefault((int(content_type_id), int(object_pk)), {})
+            for field, delta in deltas.items():
+                row[field] = row.get(field, 0) + delta
+            return len(self._rows)
+
+    def pop(self):
+        with self._lock:
+            rows, self._rows = self._rows, {}
+        return rows
+
+
+class RedisBuffer(BaseBuffer):
+    """
+    Keeps the deltas of each object in a redis hash, and the keys of the buffered objects in a redis set.
+    """
+    shared = True
+
+    def __init__(self, interval=None, max_rows=None):
+        import redis
+        super(RedisBuffer, self).__init__(interval, max_rows)
+        self.client = redis.StrictRedis.from_url(CONTENT_INTERACTIONS_STATS_BUFFER_REDIS_URL)
+        self.rows_key = '%s:rows' % CONTENT_INTERACTIONS_STATS_BUFFER_KEY_PREFIX
+
+    def _row_key(self, content_type_id, object_pk):
+        return '%s:%s:%s' % (CONTENT_INTERACTIONS_STATS_BUFFER_KEY_PREFIX, content_type_id, object_pk)
+
+    def push(self, content_type_id, object_pk, deltas):
+        row_key = self._row_key(content_type_id, object_pk)
+        pipeline = self.client.pipeline()
+        for field, delta in deltas.items():
+            pipeline.hincrby(row_key, field, delta)
+        pipeline.sadd(self.rows_key, '%s:%s' % (content_type_id, object_pk))
+        pipeline.scard(self.rows_key)
+        return pipeline.execute()[-1]
+
+    def pop(self):
+        rows = {}
+        for member in self.client.srandmember(self.rows_key, self.max_rows) or ():
+            member = member.decode('utf-8') if isinstance(member, bytes) else member
+            content_type_id, object_pk = member.split(':')
+            row_key = self._row_key(content_type_id, object_pk)
+            # reads and drops the row atomically, the increments made after it go to a new row
+            pipeline = self.client.pipeline()
+            pipeline.srem(self.rows_key, member)
+            pipeline.hgetall(row_key)
+            pipeline.delete(row_key)
+            removed, deltas, deleted = pipeline.execute()
+            row = rows.setdefault((int(content_type_id), int(object_pk)), {})
+            for field, delta in deltas.items():
+                field = field.decode('utf-8') if isinstance(field, bytes) else field
+                row[field] = row.get(field, 0) + int(delta)
+        return rows
+
+
+class RedisQueueBuffer(RedisBuffer):
+    """
+    Appends each event to a redis list, as a compact 'content_type:object_pk:counter=delta,...' string,
+    which costs the processes one command per event. The flush drains up to ``max_rows`` events and adds
+    up their deltas per object.
+    """
+
+    def __init__(self, interval=None, max_rows=None):
+        super(RedisQueueBuffer, self).__init__(interval, max_rows)
+        self.events_key = '%s:events' % CONTENT_INTERACTIONS_STATS_BUFFER_KEY_PREFIX
+
+    def push(self, content_type_id, object_pk, deltas):
+        return self.client.rpush(self.events_key, '%s:%s:%s' % (
+            content_type_id, object_pk, ','.join('%s=%s' % (field, delta) for field, delta in deltas.items())
+        ))
+
+    def pop(self):
+        pipeline = self.client.pipeline()
+        pipeline.lrange(self.events_key, 0, self.max_rows - 1)
+        pipeline.ltrim(self.events_key, self.max_rows, -1)
+        events, trimmed = pipeline.execute()
+        rows = {}
+        for event in events:
+            event = event.decode('utf-8') if isinstance(event, bytes) else event
+            content_type_id, object_pk, deltas = event.split(':')
+            row = rows.setdefault((int(content_type_id), int(object_pk)), {})
+            for delta in deltas.split(','):
+                field, delta = delta.split('=')
+                row[field] = row.get(field, 0) + int(delta)
+        return rows
+
+
+_buffer = []
+
+
+def get_buffer():
+    """
+    Returns the stats buffer of the process, or None if CONTENT_INTERACTIONS_STATS_BUFFER is not set.
+    """
+    if not CONTENT_INTERACTIONS_STATS_BUFFER:
+        return None
+    if not _buffer:
+        _buffer.append(import_by_path(CONTENT_INTERACTIONS_STATS_BUFFER)())
+    return _buffer[0]
@@ -9,60 +9,82 @@ from settings import (
     CONTENT_INTERACTIONS_COMMENT_PROCESSING_DELAY,
     CONTENT_INTERACTIONS_VISIT_PROCESSING_DELAY,
 )
+from buffers import get_buffer
+
+
+def _buffered(item, deltas):
+    """
+    Adds the counter deltas of the item to the stats buffer, if there is one, and returns whether they
+    were buffered.
+    """
+    stats_buffer = get_buffer()
+    if stats_buffer is None:
+        return False
+    stats_buffer.add(ContentType.objects.get_for_model(item).pk, item.pk, deltas)
+    return True
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def like_handler(instance, **kwargs):
+    if _buffered(instance, {'likes': 1}):
+        return
     if CONTENT_INTERACTIONS_LIKE_PROCESSING_DELAY:
         try:
             from tasks import item_like_process
-            item_like_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_like_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_like_process as sync_item_like_process
-    sync_item_like_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_like_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def dislike_handler(instance, **kwargs):
+    if _buffered(instance, {'likes': -1}):
+        return
     if CONTENT_INTERACTIONS_LIKE_PROCESSING_DELAY:
         try:
             from tasks import item_dislike_process
-            item_dislike_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_dislike_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_dislike_process as sync_item_dislike_process
-    sync_item_dislike_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_dislike_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def new_rating_handler(instance, rating, **kwargs):
+    if _buffered(instance, {'ratings': 1, 'rating_%s_count' % rating: 1}):
+        return
     if CONTENT_INTERACTIONS_RATE_PROCESSING_DELAY:
         try:
             from tasks import item_new_rating_process
-            item_new_rating_process.delay(instance.pk, ContentType.objects.get_for_model(instance), rating)
+            item_new_rating_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk, rating)
             return
         except ImportError:
             pass
     from utils import item_new_rating_process as sync_item_new_rating_process
-    sync_item_new_rating_process(instance.pk, ContentType.objects.get_for_model(instance), rating)
+    sync_item_new_rating_process(instance.pk, ContentType.objects.get_for_model(instance).pk, rating)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def updated_rating_handler(instance, rating, old_rating, **kwargs):
+    deltas = {'rating_%s_count' % old_rating: -1, 'rating_%s_count' % rating: 1} if old_rating != rating else {}
+    if _buffered(instance, deltas):
+        return
     if CONTENT_INTERACTIONS_RATE_PROCESSING_DELAY:
         try:
             from tasks import item_updated_rating_process
             item_updated_rating_process.delay(
-                instance.pk, ContentType.objects.get_for_model(instance), old_rating, rating
+                instance.pk, ContentType.objects.get_for_model(instance).pk, old_rating, rating
             )
             return
         except ImportError:
             pass
     from utils import item_updated_rating_process as sync_item_updated_rating_process
-    sync_item_updated_rating_process(instance.pk, ContentType.objects.get_for_model(instance), old_rating, rating)
+    sync_item_updated_rating_process(instance.pk, ContentType.objects.get_for_model(instance).pk, old_rating, rating)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
@@ -79,105 +101,190 @@ def update_cached_rating(instance, **kwargs):
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def favorite_mark_handler(instance, **kwargs):
+    if _buffered(instance, {'favorite_marks': 1}):
+        return
     if CONTENT_INTERACTIONS_FAVORITE_PROCESSING_DELAY:
         try:
             from tasks import item_marked_favorite_process
-            item_marked_favorite_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_marked_favorite_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_marked_favorite_process as sync_item_marked_favorite_process
-    sync_item_marked_favorite_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_marked_favorite_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def favorite_unmark_handler(instance, **kwargs):
+    if _buffered(instance, {'favorite_marks': -1}):
+        return
     if CONTENT_INTERACTIONS_FAVORITE_PROCESSING_DELAY:
         try:
             from tasks import item_unmarked_favorite_process
-            item_unmarked_favorite_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_unmarked_favorite_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_unmarked_favorite_process as sync_item_unmarked_favorite_process
-    sync_item_unmarked_favorite_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_unmarked_favorite_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def denounce_handler(instance, **kwargs):
+    if _buffered(instance, {'denounces': 1}):
+        return
     if CONTENT_INTERACTIONS_DENOUNCE_PROCESSING_DELAY:
         try:
             from tasks import item_denounced_process
-            item_denounced_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_denounced_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_denounced_process as sync_item_denounced_process
-    sync_item_denounced_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_denounced_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def denounce_remove_handler(instance, **kwargs):
+    if _buffered(instance, {'denounces': -1}):
+        return
     if CONTENT_INTERACTIONS_DENOUNCE_PROCESSING_DELAY:
         try:
             from tasks import item_denounce_removed_process
-            item_denounce_removed_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_denounce_removed_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_denounce_removed_process as sync_item_denounce_removed_process
-    sync_item_denounce_removed_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_denounce_removed_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def share_handler(instance, **kwargs):
+    if _buffered(instance, {'shares': 1}):
+        return
     if CONTENT_INTERACTIONS_SHARE_PROCESSING_DELAY:
         try:
             from tasks import item_shared_process
-            item_shared_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_shared_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_shared_process as sync_item_shared_process
-    sync_item_shared_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_shared_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def comment_handler(instance, user, answer_to, **kwargs):
     commented_item = instance.content_object
+    if _buffered(commented_item, {'comments': 1}):
+        return
     if CONTENT_INTERACTIONS_COMMENT_PROCESSING_DELAY:
         try:
             from tasks import item_got_comment_process
-            item_got_comment_process.delay(commented_item.pk, ContentType.objects.get_for_model(commented_item))
+            item_got_comment_process.delay(commented_item.pk, ContentType.objects.get_for_model(commented_item).pk)
             return
         except ImportError:
             pass
     from utils import item_got_comment_process as sync_item_got_comment_process
-    sync_item_got_comment_process(commented_item.pk, ContentType.objects.get_for_model(commented_item))
+    sync_item_got_comment_process(commented_item.pk, ContentType.objects.get_for_model(commented_item).pk)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
-def comment_deleted_handler(instance, **kwargs):
+def comment_deleted_handler(instance, count=1, **kwargs):
     commented_item = instance.content_object
+    if _buffered(commented_item, {'comments': -count}):
+        return
     if CONTENT_INTERACTIONS_COMMENT_PROCESSING_DELAY:
         try:
             from tasks import item_comment_deleted_process
-            item_comment_deleted_process.delay(commented_item.pk, ContentType.objects.get_for_model(commented_item))
+            item_comment_deleted_process.delay(
+                commented_item.pk, ContentType.objects.get_for_model(commented_item).pk, count
+            )
             return
         except ImportError:
             pass
     from utils import item_comment_deleted_process as sync_item_comment_deleted_process
-    sync_item_comment_deleted_process(commented_item.pk, ContentType.objects.get_for_model(commented_item))
+    sync_item_comment_deleted_process(commented_item.pk, ContentType.objects.get_for_model(commented_item).pk, count)
 
 
 # noinspection PyUnresolvedReferences,PyUnusedLocal
 def visit_handler(instance, **kwargs):
+    if _buffered(instance, {'visits': 1}):
+        return
     if CONTENT_INTERACTIONS_VISIT_PROCESSING_DELAY:
         try:
             from tasks import item_visited_process
-            item_visited_process.delay(instance.pk, ContentType.objects.get_for_model(instance))
+            item_visited_process.delay(instance.pk, ContentType.objects.get_for_model(instance).pk)
             return
         except ImportError:
             pass
     from utils import item_visited_process as sync_item_visited_process
-    sync_item_visited_process(instance.pk, ContentType.objects.get_for_model(instance))
+    sync_item_visited_process(instance.pk, ContentType.objects.get_for_model(instance).pk)
+
+
+def _items_counters_process(model, deltas, delay):
+    items = [(item_id, item_deltas) for item_id, item_deltas in deltas.items() if any(item_deltas.values())]
+    if not items:
+        return
+    stats_buffer = get_buffer()
+    if stats_buffer is not None:
+        content_type_pk = ContentType.objects.get_for_model(model).pk
+        for item_id, item_deltas in items:
+            stats_buffer.add(content_type_pk, item_id, item_deltas)
+        return
+    if delay:
+        try:
+            from tasks import items_counters_process
+            items_counters_process.delay(ContentType.objects.get_for_model(model).pk, items)
+            return
+        except ImportError:
+            pass
+    from utils import items_counters_process as sync_items_counters_process
+    sync_items_counters_process(ContentType.objects.get_for_model(model).pk, items)
+
+
+# noinspection PyUnresolvedReferences,PyUnusedLocal
+def bulk_like_handler(sender, counts, **kwargs):
+    _items_counters_process(
+        sender,
+        dict((item.pk, {'likes': count}) for item, count in counts.items()),
+        CONTENT_INTERACTIONS_LIKE_PROCESSING_DELAY
+    )
+
+
+# noinspection PyUnresolvedReferences,PyUnusedLocal
+def bulk_rating_handler(sender, counts, values, **kwargs):
+    deltas = {}
+    for item, count in counts.items():
+        item_deltas = deltas.setdefault(item.pk, {'ratings': count})
+        for rating, delta in values.get(item, {}).items():
+            item_deltas['rating_%s_count' % rating] = item_deltas.get('rating_%s_count' % rating, 0) + delta
+    _items_counters_process(sender, deltas, CONTENT_INTERACTIONS_RATE_PROCESSING_DELAY)
+
+
+# noinspection PyUnresolvedReferences,PyUnusedLocal
+def bulk_favorite_mark_handler(sender, counts, **kwargs):
+    _items_counters_process(
+        sender,
+        dict((item.pk, {'favorite_marks': count}) for item, count in counts.items()),
+        CONTENT_INTERACTIONS_FAVORITE_PROCESSING_DELAY
+    )
+
+
+# noinspection PyUnresolvedReferences,PyUnusedLocal
+def bulk_denounce_handler(sender, counts, **kwargs):
+    _items_counters_process(
+        sender,
+        dict((item.pk, {'denounces': count}) for item, count in counts.items()),
+        CONTENT_INTERACTIONS_DENOUNCE_PROCESSING_DELAY
+    )
+
+
+# noinspection PyUnresolvedReferences,PyUnusedLocal
+def bulk_comment_handler(sender, counts, **kwargs):
+    _items_counters_process(
+        sender,
+        dict((item.pk, {'comments': count}) for item, count in counts.items()),
+        CONTENT_INTERACTIONS_COMMENT_PROCESSING_DELAY
+    )
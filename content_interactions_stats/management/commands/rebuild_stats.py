@@ -0,0 +1,113 @@
+# coding=utf-8
+import json
+import multiprocessing
+import os
+from optparse import make_option
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from content_interactions_stats.rebuild import stats_models, pk_chunks, rebuild_chunk
+
+
+def _rebuild(task):
+    # run in the pool processes
+    content_type_id, pks, dry_run = task
+    return content_type_id, pks[-1], len(pks), rebuild_chunk(content_type_id, pks, dry_run)
+
+
+class Command(BaseCommand):
+    help = (
+        "Counts the likes, favorite marks, ratings, denounces and comments of the objects and rebuilds "
+        "their stats: the missing stats are created and the drifted ones repaired. The objects are "
+        "processed in chunks of consecutive pks, in parallel. With a checkpoint file, the last pk rebuilt "
+        "of each content type is saved after each chunk, and the next run resumes from there."
+    )
+    option_list = BaseCommand.option_list + (
+        make_option('--content-type', dest='content_types', action='append', default=None,
+                    help="Only rebuilds the stats of this content type, as 'app_label.model'. Can be repeated."),
+        make_option('--chunk-size', dest='chunk_size', type='int', default=1000,
+                    help="The number of objects per chunk."),
+        make_option('--processes', dest='processes', type='int', default=None,
+                    help="The number of processes. The number of CPUs by default."),
+        make_option('--checkpoint', dest='checkpoint', default=None,
+                    help="The checkpoint file. None by default."),
+        make_option('--restart', dest='restart', action='store_true', default=False,
+                    help="Ignores the checkpoint and rebuilds all the stats."),
+        make_option('--dry-run', dest='dry_run', action='store_true', default=False,
+                    help="Reports the stats that are missing or drifted, without rebuilding them."),
+    )
+
+    def handle(self, *args, **options):
+        content_types = self.get_content_types(options['content_types'])
+        checkpoint = options['checkpoint']
+        progress = {} if options['restart'] or not checkpoint else self.read_checkpoint(checkpoint)
+        dry_run = options['dry_run']
+        processes = options['processes'] or multiprocessing.cpu_count()
+
+        labels = dict((content_type.pk, self.label(content_type)) for content_type in content_types)
+        tasks = self.tasks(content_types, options['chunk_size'], progress, dry_run)
+
+        pool = None
+        if processes > 1:
+            # the forked processes must not share the connections of this one
+            for connection in connections.all():
+                connection.close()
+            pool = multiprocessing.Pool(processes)
+            results = pool.imap(_rebuild, tasks)
+        else:
+            results = (_rebuild(task) for task in tasks)
+
+        total, drifted = 0, 0
+        try:
+            for content_type_id, last_pk, count, diffs in results:
+                total += count
+                drifted += len(diffs)
+                if dry_run or int(options['verbosity']) > 1:
+                    for pk, changed in diffs:
+                        self.stdout.write("%s %s: %s" % (labels[content_type_id], pk, ', '.join(
+                            '%s %s -> %s' % (field, '-' if current is None else current, value)
+                            for field, (current, value) in sorted(changed.items())
+                        )))
+                if checkpoint and not dry_run:
+                    # the results come in order, so all the objects up to last_pk are rebuilt
+                    progress[labels[content_type_id]] = last_pk
+                    self.write_checkpoint(checkpoint, progress)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        self.stdout.write("%s objects counted, %s stats %s." % (
+            total, drifted, 'missing or drifted' if dry_run else 'rebuilt'
+        ))
+
+    def get_content_types(self, labels):
+        if not labels:
+            return [ContentType.objects.get_for_model(model) for model in stats_models()]
+        content_types = []
+        for label in labels:
+            try:
+                app_label, model = label.split('.')
+                content_types.append(ContentType.objects.get_by_natural_key(app_label, model))
+            except (ValueError, ContentType.DoesNotExist):
+                raise CommandError("Invalid content type: %s" % label)
+        return content_types
+
+    def tasks(self, content_types, chunk_size, progress, dry_run):
+        for content_type in content_types:
+            for pks in pk_chunks(content_type.model_class(), chunk_size, progress.get(self.label(content_type))):
+                yield content_type.pk, pks, dry_run
+
+    def label(self, content_type):
+        return '%s.%s' % (content_type.app_label, content_type.model)
+
+    def read_checkpoint(self, checkpoint):
+        if not os.path.exists(checkpoint):
+            return {}
+        with open(checkpoint) as f:
+            return json.loads(f.read() or '{}')
+
+    def write_checkpoint(self, checkpoint, progress):
+        temporary = '%s.tmp' % checkpoint
+        with open(temporary, 'w') as f:
+            f.write(json.dumps(progress))
+        os.rename(temporary, checkpoint)
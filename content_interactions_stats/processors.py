@@ -14,7 +14,12 @@ from content_interactions.signals import (
     item_denounced,
     item_denounce_removed,
     item_commented,
-    item_comment_removed
+    item_comment_removed,
+    items_liked,
+    items_rated,
+    items_marked_as_favorite,
+    items_denounced,
+    items_commented
 )
 from handlers import (
     like_handler,
@@ -29,7 +34,12 @@ from handlers import (
     denounce_remove_handler,
     comment_handler,
     comment_deleted_handler,
-    visit_handler
+    visit_handler,
+    bulk_like_handler,
+    bulk_rating_handler,
+    bulk_favorite_mark_handler,
+    bulk_denounce_handler,
+    bulk_comment_handler
 )
 
 
@@ -70,6 +80,7 @@ class Likes(BaseProcessor):
     handlers = (
         ('item_liked', item_liked, like_handler),
         ('item_disliked', item_disliked, dislike_handler),
+        ('items_liked', items_liked, bulk_like_handler),
     )
 
 
@@ -89,6 +100,7 @@ class Ratings(BaseProcessor):
     handlers = (
         ('item_rated', item_rated, new_rating_handler),
         ('item_rate_modified', item_rate_modified, updated_rating_handler),
+        ('items_rated', items_rated, bulk_rating_handler),
     )
 
 
@@ -99,6 +111,7 @@ class FavoriteMarks(BaseProcessor):
     handlers = (
         ('item_marked_favorite', item_marked_as_favorite, favorite_mark_handler),
         ('item_unmarked_favorite', item_unmarked_as_favorite, favorite_unmark_handler),
+        ('items_marked_favorite', items_marked_as_favorite, bulk_favorite_mark_handler),
     )
 
 
@@ -118,6 +131,7 @@ class Denounces(BaseProcessor):
     handlers = (
         ('item_denounced', item_denounced, denounce_handler),
         ('item_denounce_removed', item_denounce_removed, denounce_remove_handler),
+        ('items_denounced', items_denounced, bulk_denounce_handler),
     )
 
 
@@ -128,6 +142,7 @@ class Comments(BaseProcessor):
     handlers = (
         ('item_commented', item_commented, comment_handler),
         ('item_comment_removed', item_comment_removed, comment_deleted_handler),
+        ('items_commented', items_commented, bulk_comment_handler),
     )
 
 
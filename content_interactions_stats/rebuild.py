@@ -0,0 +1,156 @@
+# coding=utf-8
+"""
+Rebuild of the stats counters from their sources: the likes, favorite marks, ratings and denounces from
+the social graph edges, and the comments from the comment table.
+
+The objects are processed in chunks of consecutive pks. Each chunk is counted with one grouped query
+per counter, compared with the stats of its objects, read with one query, and repaired in a transaction:
+the missing stats are bulk inserted and the drifted ones updated. The shares and visits have no source
+to be rebuilt from, so they are left as they are.
+"""
+from decimal import Decimal
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction, IntegrityError
+from django.db.models import Count
+from django.utils.encoding import force_text
+from content_interactions.mixins import (
+    ContentInteractionMixin, LikableMixin, FavoriteListItemMixin, RateableMixin, DenounceTargetMixin,
+    CommentTargetMixin, RATING_VALUES, liked_by_edge, favorite_of_edge, rated_by_edge, denounced_by_edge
+)
+
+
+def stats_models():
+    """
+    Returns the models whose objects have stats.
+    """
+    from django.db.models import get_models
+    return [model for model in get_models() if issubclass(model, ContentInteractionMixin)]
+
+
+def pk_chunks(model, chunk_size, after=None):
+    """
+    Yields the pks of the objects of the model, in order, in lists of up to ``chunk_size``, starting after
+    the pk ``after``.
+    """
+    while True:
+        queryset = model._base_manager.order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        after = pks[-1]
+
+
+def _edge_counts(edge_type, content_type_id, node_pks):
+    from social_graph.models import Edge
+    return dict(((node_pk, site_id), count) for node_pk, site_id, count in Edge.objects.filter(
+        fromNode_type=content_type_id, fromNode_pk__in=node_pks, type=edge_type
+    ).values_list('fromNode_pk', 'site').annotate(count=Count('pk')).order_by())
+
+
+def _rating_histograms(content_type_id, node_pks):
+    from social_graph.models import Edge
+    histograms = {}
+    for _edge in Edge.objects.filter(
+        fromNode_type=content_type_id, fromNode_pk__in=node_pks, type=rated_by_edge()
+    ).only('fromNode_pk', 'site', 'attributes').iterator():
+        counts = histograms.setdefault((_edge.fromNode_pk, _edge.site_id), dict((value, 0) for value in RATING_VALUES))
+        rating = _edge.attributes['rating']
+        counts[rating] = counts.get(rating, 0) + 1
+    return histograms
+
+
+def compute_stats(content_type_id, pks):
+    """
+    Counts the interactions of the objects of the content type with the passed pks, as the stats bootstrap
+    does for a single object, and returns the {pk: {counter: value}} counters of the existing objects. Only
+    the counters of the installed stats processors are counted.
+    """
+    from models import Stats
+    from content_interactions.models import Comment
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    fields = set(Stats._meta.get_all_field_names())
+    # the interactions of each object are counted on its site, as the mixins do
+    keys = dict(
+        (pk, (force_text(pk), obj.get_site().pk)) for pk, obj in model._base_manager.in_bulk(pks).items()
+    )
+    node_pks = [node_pk for node_pk, site_id in keys.values()]
+    values = dict((pk, {}) for pk in keys)
+
+    for field, mixin, edge_type in (
+        ('likes', LikableMixin, liked_by_edge),
+        ('favorite_marks', FavoriteListItemMixin, favorite_of_edge),
+        ('denounces', DenounceTargetMixin, denounced_by_edge),
+    ):
+        if field in fields and issubclass(model, mixin):
+            counts = _edge_counts(edge_type(), content_type_id, node_pks)
+            for pk, key in keys.items():
+                values[pk][field] = counts.get(key, 0)
+
+    if 'ratings' in fields and issubclass(model, RateableMixin):
+        histograms = _rating_histograms(content_type_id, node_pks)
+        for pk, key in keys.items():
+            counts = histograms.get(key, {})
+            count = sum(counts.values())
+            values[pk]['ratings'] = count
+            for value in range(1, 6):
+                values[pk]['rating_%s_count' % value] = counts.get(value, 0)
+            if 'rating' in fields:
+                total = sum(value * value_count for value, value_count in counts.items())
+                values[pk]['rating'] = Decimal('%.1f' % (total/(count * float(1)) if count else 0))
+
+    if 'comments' in fields and issubclass(model, CommentTargetMixin):
+        # the stats objects have integer pks, matched by the indexed 'object_id' copy of 'object_pk'
+        counts = dict(Comment.objects.filter(
+            content_type=content_type_id, object_id__in=list(keys)
+        ).values_list('object_id').annotate(count=Count('pk')).order_by())
+        for pk in keys:
+            values[pk]['comments'] = counts.get(pk, 0)
+    return values
+
+
+def rebuild_chunk(content_type_id, pks, dry_run=False, attempts=3):
+    """
+    Rebuilds the stats of the objects of the content type with the passed pks. Returns the stats that
+    were missing or drifted, as a list of (pk, {counter: (current value, counted value)}) tuples, where
+    the current values of missing stats are None. If ``dry_run`` nothing is written.
+    """
+    values = compute_stats(content_type_id, pks)
+    for attempt in range(attempts):
+        try:
+            return _write_stats(content_type_id, values, dry_run)
+        except IntegrityError:
+            # some of the missing stats were created meanwhile, by an event, so they are read again
+            if attempt == attempts - 1:
+                raise
+
+
+def _write_stats(content_type_id, values, dry_run):
+    from models import Stats
+    existing = dict(
+        (stats_obj.object_pk, stats_obj)
+        for stats_obj in Stats.objects.filter(content_type=content_type_id, object_pk__in=list(values))
+    )
+    diffs, missing = [], []
+    with transaction.atomic():
+        for pk, item_values in sorted(values.items()):
+            stats_obj = existing.get(pk)
+            if stats_obj is None:
+                diffs.append((pk, dict((field, (None, value)) for field, value in item_values.items())))
+                missing.append(Stats(content_type_id=content_type_id, object_pk=pk, **item_values))
+                continue
+            changed = dict(
+                (field, (getattr(stats_obj, field), value))
+                for field, value in item_values.items() if getattr(stats_obj, field) != value
+            )
+            if changed:
+                diffs.append((pk, changed))
+                if not dry_run:
+                    Stats.objects.filter(pk=stats_obj.pk).update(**dict(
+                        (field, value) for field, (current, value) in changed.items()
+                    ))
+        if missing and not dry_run:
+            Stats.objects.bulk_create(missing)
+    return diffs
@@ -34,4 +34,25 @@ CONTENT_INTERACTIONS_COMMENT_PROCESSING_DELAY = getattr(
 )
 CONTENT_INTERACTIONS_VISIT_PROCESSING_DELAY = getattr(
     settings, 'CONTENT_INTERACTIONS_VISIT_PROCESSING_DELAY', CONTENT_INTERACTIONS_STATS_PROCESSING_DELAY
-)
\ No newline at end of file
+)
+
+# buffer of counter deltas: None (the stats are written on each event), or the path of a buffer class,
+# 'content_interactions_stats.buffers.MemoryBuffer', 'content_interactions_stats.buffers.RedisBuffer' or
+# 'content_interactions_stats.buffers.RedisQueueBuffer'
+CONTENT_INTERACTIONS_STATS_BUFFER = getattr(settings, 'CONTENT_INTERACTIONS_STATS_BUFFER', None)
+
+# seconds between flushes of the buffer, 0 to leave them to the periodic 'flush_stats_buffer' task
+CONTENT_INTERACTIONS_STATS_BUFFER_FLUSH_INTERVAL = getattr(
+    settings, 'CONTENT_INTERACTIONS_STATS_BUFFER_FLUSH_INTERVAL', 5
+)
+
+# number of buffered stats rows that forces a flush, and number of events drained by RedisQueueBuffer per flush
+CONTENT_INTERACTIONS_STATS_BUFFER_MAX_ROWS = getattr(settings, 'CONTENT_INTERACTIONS_STATS_BUFFER_MAX_ROWS', 1000)
+
+CONTENT_INTERACTIONS_STATS_BUFFER_REDIS_URL = getattr(
+    settings, 'CONTENT_INTERACTIONS_STATS_BUFFER_REDIS_URL', 'redis://localhost:6379/0'
+)
+
+CONTENT_INTERACTIONS_STATS_BUFFER_KEY_PREFIX = getattr(
+    settings, 'CONTENT_INTERACTIONS_STATS_BUFFER_KEY_PREFIX', 'content_interactions_stats'
+)
@@ -63,9 +63,9 @@ def item_got_comment_process(item_id, item_content_type):
 
 
 @shared_task(name='content_interactions.comment_deleted_process')
-def item_comment_deleted_process(item_id, item_content_type):
+def item_comment_deleted_process(item_id, item_content_type, count=1):
     from content_interactions_stats.utils import item_comment_deleted_process
-    item_comment_deleted_process(item_id, item_content_type)
+    item_comment_deleted_process(item_id, item_content_type, count)
 
 
 @shared_task(name='content_interactions.visit_process')
@@ -73,3 +73,22 @@ def item_visited_process(item_id, item_content_type):
     from content_interactions_stats.utils import item_visited_process
     item_visited_process(item_id, item_content_type)
 
+
+@shared_task(name='content_interactions.counters_process')
+def items_counters_process(item_content_type, items):
+    from content_interactions_stats.utils import items_counters_process
+    items_counters_process(item_content_type, items)
+
+
+@shared_task(name='content_interactions.flush_stats_buffer', ignore_result=True)
+def flush_stats_buffer(batches=10):
+    """
+    Drains the stats buffer, up to ``batches`` flushes of CONTENT_INTERACTIONS_STATS_BUFFER_MAX_ROWS rows.
+    """
+    from content_interactions_stats.buffers import get_buffer
+    stats_buffer = get_buffer()
+    if stats_buffer is None:
+        return
+    for batch in range(batches):
+        if not stats_buffer.flush():
+            break
@@ -1,135 +1,181 @@
 # coding=utf-8
-from django.db.models import F
+from django.db import connection, transaction, IntegrityError
+from django.db.models import AutoField
+
+
+RATING_COUNTERS = ('ratings', 'rating_5_count', 'rating_4_count', 'rating_3_count', 'rating_2_count', 'rating_1_count')
+
+
+def _supports_upsert():
+    if connection.vendor == 'mysql':
+        return True
+    if connection.vendor == 'postgresql':
+        return getattr(connection, 'pg_version', 0) >= 90500
+    if connection.vendor == 'sqlite':
+        from django.db.backends.sqlite3.base import Database
+        return Database.sqlite_version_info >= (3, 24, 0)
+    return False
+
+
+def _rating_sql(value):
+    # ``value(counter)`` is the SQL of the new value of a rating counter
+    return 'CASE WHEN %(ratings)s > 0 THEN ROUND((%(sum)s) * 1.0 / %(ratings)s, 1) ELSE 0 END' % {
+        'ratings': value('ratings'),
+        'sum': ' + '.join('%s * %s' % (stars, value('rating_%s_count' % stars)) for stars in range(5, 0, -1)),
+    }
+
+
+def _set_sql(stats_clazz, deltas, qualifier='', assigns_in_order=False):
+    """
+    Returns the assignments that add the deltas to their columns, and recompute the average rating if a
+    rating counter changed, with their params. If ``assigns_in_order`` (MySQL) the rating is computed from
+    the columns, already updated, otherwise from the counters plus their deltas.
+    """
+    qn = connection.ops.quote_name
+
+    def column(name):
+        return '%s%s' % (qualifier, qn(stats_clazz._meta.get_field(name).column))
+
+    assignments, params = [], []
+    for field, delta in sorted(deltas.items()):
+        assignments.append('%s = %s + %%s' % (qn(stats_clazz._meta.get_field(field).column), column(field)))
+        params.append(delta)
+    if 'rating' in stats_clazz._meta.get_all_field_names() and any(field in RATING_COUNTERS for field in deltas):
+        def value(name):
+            if assigns_in_order or name not in deltas:
+                return column(name)
+            params.append(deltas[name])
+            return '(%s + %%s)' % column(name)
+        assignments.append('%s = %s' % (qn(stats_clazz._meta.get_field('rating').column), _rating_sql(value)))
+    return ', '.join(assignments), params
+
+
+def _insert_sql(stats_clazz, item_id, item_content_type, counters):
+    """
+    Returns the INSERT of a new stats row with the given counters, and its params. The row gets all its
+    columns, the ones not given with their default values, and the average rating of its counters.
+    """
+    qn = connection.ops.quote_name
+    stats_obj = stats_clazz(object_pk=item_id, content_type_id=getattr(item_content_type, 'pk', item_content_type))
+    for field, value in counters.items():
+        setattr(stats_obj, field, value)
+    if 'rating' in stats_clazz._meta.get_all_field_names():
+        from handlers import update_cached_rating
+        update_cached_rating(stats_obj)
+    fields = [field for field in stats_clazz._meta.local_fields if not isinstance(field, AutoField)]
+    return 'INSERT INTO %s (%s) VALUES (%s)' % (
+        qn(stats_clazz._meta.db_table),
+        ', '.join(qn(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields))
+    ), [field.get_db_prep_save(field.pre_save(stats_obj, True), connection) for field in fields]
+
+
+def upsert_counters(item_id, item_content_type, deltas, initial=None):
+    """
+    Adds the {counter: delta} deltas to the stats of the item, in one statement where the database
+    supports it ('ON CONFLICT DO UPDATE' or 'ON DUPLICATE KEY UPDATE'), and in an UPDATE followed by an
+    INSERT if no row was updated otherwise. Only the counters of the deltas, and the average rating if a
+    rating counter changed, are written.
+
+    If the item has no stats yet, they are created with the ``initial`` counters, by default the
+    positive deltas, so decrements don't leave negative counters.
+
+    ``item_content_type`` is the pk of the content type of the item (a ContentType is accepted too).
+    """
+    from models import Stats
+    deltas = dict((field, delta) for field, delta in deltas.items() if delta)
+    if initial is None:
+        initial = dict((field, delta) for field, delta in deltas.items() if delta > 0)
+    qn = connection.ops.quote_name
+    table = qn(Stats._meta.db_table)
+    keys = [qn(Stats._meta.get_field(name).column) for name in ('content_type', 'object_pk')]
+    cursor = connection.cursor()
+
+    if deltas and _supports_upsert():
+        insert, insert_params = _insert_sql(Stats, item_id, item_content_type, initial)
+        if connection.vendor == 'mysql':
+            assignments, params = _set_sql(Stats, deltas, assigns_in_order=True)
+            cursor.execute('%s ON DUPLICATE KEY UPDATE %s' % (insert, assignments), insert_params + params)
+        else:
+            assignments, params = _set_sql(Stats, deltas, qualifier='%s.' % table)
+            cursor.execute('%s ON CONFLICT (%s) DO UPDATE SET %s' % (
+                insert, ', '.join(keys), assignments
+            ), insert_params + params)
+        return
+
+    with transaction.atomic():
+        if deltas:
+            assignments, params = _set_sql(Stats, deltas)
+            update = 'UPDATE %s SET %s WHERE %s = %%s AND %s = %%s' % (table, assignments, keys[0], keys[1])
+            params += [getattr(item_content_type, 'pk', item_content_type), item_id]
+            cursor.execute(update, params)
+            if cursor.rowcount:
+                return
+        insert, insert_params = _insert_sql(Stats, item_id, item_content_type, initial)
+        try:
+            with transaction.atomic():
+                cursor.execute(insert, insert_params)
+        except IntegrityError:
+            # inserted meanwhile by another process
+            if deltas:
+                cursor.execute(update, params)
 
 
 def item_like_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.likes = F('likes')+1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'likes': 1})
 
 
 def item_dislike_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    if not created:
-        stats_obj.likes = F('likes')-1
-        stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'likes': -1})
 
 
 def item_new_rating_process(item_id, item_content_type, rating):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.ratings = F('ratings')+1
-    if rating == 5:
-        stats_obj.rating_5_count = F('rating_5_count')+1
-    elif rating == 4:
-        stats_obj.rating_4_count = F('rating_4_count')+1
-    elif rating == 3:
-        stats_obj.rating_3_count = F('rating_3_count')+1
-    elif rating == 2:
-        stats_obj.rating_2_count = F('rating_2_count')+1
-    elif rating == 1:
-        stats_obj.rating_1_count = F('rating_1_count')+1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'ratings': 1, 'rating_%s_count' % rating: 1})
 
 
 def item_updated_rating_process(item_id, item_content_type, old_rating, rating):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    if not created and (old_rating != rating):
-        # remove ald rating
-        if old_rating == 5:
-            stats_obj.rating_5_count = F('rating_5_count')-1
-        elif old_rating == 4:
-            stats_obj.rating_4_count = F('rating_4_count')-1
-        elif old_rating == 3:
-            stats_obj.rating_3_count = F('rating_3_count')-1
-        elif old_rating == 2:
-            stats_obj.rating_2_count = F('rating_2_count')-1
-        elif old_rating == 1:
-            stats_obj.rating_1_count = F('rating_1_count')-1
-        # add new rating
-        if rating == 5:
-            stats_obj.rating_5_count = F('rating_5_count')+1
-        elif rating == 4:
-            stats_obj.rating_4_count = F('rating_4_count')+1
-        elif rating == 3:
-            stats_obj.rating_3_count = F('rating_3_count')+1
-        elif rating == 2:
-            stats_obj.rating_2_count = F('rating_2_count')+1
-        elif rating == 1:
-            stats_obj.rating_1_count = F('rating_1_count')+1
-    elif created:
-        stats_obj.ratings = F('ratings')+1
-        # add new rating
-        if rating == 5:
-            stats_obj.rating_5_count = F('rating_5_count')+1
-        elif rating == 4:
-            stats_obj.rating_4_count = F('rating_4_count')+1
-        elif rating == 3:
-            stats_obj.rating_3_count = F('rating_3_count')+1
-        elif rating == 2:
-            stats_obj.rating_2_count = F('rating_2_count')+1
-        elif rating == 1:
-            stats_obj.rating_1_count = F('rating_1_count')+1
-
-    stats_obj.save()
+    deltas = {'rating_%s_count' % old_rating: -1, 'rating_%s_count' % rating: 1} if old_rating != rating else {}
+    # stats created now count the rating as a new one
+    upsert_counters(item_id, item_content_type, deltas, initial={'ratings': 1, 'rating_%s_count' % rating: 1})
 
 
 def item_marked_favorite_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.favorite_marks = F('favorite_marks')+1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'favorite_marks': 1})
 
 
 def item_unmarked_favorite_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    if not created:
-        stats_obj.favorite_marks = F('favorite_marks')-1
-        stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'favorite_marks': -1})
 
 
 def item_shared_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.shares = F('shares')+1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'shares': 1})
 
 
 def item_visited_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.visits = F('visits')+1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'visits': 1})
 
 
 def item_denounced_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.denounces = F('denounces')+1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'denounces': 1})
 
 
 def item_denounce_removed_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.denounces = F('denounces')-1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'denounces': -1})
 
 
 def item_got_comment_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    stats_obj.comments = F('comments')+1
-    stats_obj.save()
+    upsert_counters(item_id, item_content_type, {'comments': 1})
 
 
-def item_comment_deleted_process(item_id, item_content_type):
-    from models import Stats
-    stats_obj, created = Stats.objects.get_or_create(object_pk=item_id, content_type=item_content_type)
-    if not created:
-        stats_obj.comments = F('comments')-1
-        stats_obj.save()
\ No newline at end of file
+def item_comment_deleted_process(item_id, item_content_type, count=1):
+    upsert_counters(item_id, item_content_type, {'comments': -count})
+
+
+def item_counters_process(item_id, item_content_type, deltas):
+    upsert_counters(item_id, item_content_type, deltas)
+
+
+def items_counters_process(item_content_type, items):
+    with transaction.atomic():
+        for item_id, deltas in items:
+            item_counters_process(item_id, item_content_type, deltas)
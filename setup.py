@@ -5,7 +5,7 @@ setup(
     url="http://github.com/suselrd/django-content-interactions/",
     author="Susel Ruiz Duran",
     author_email="suselrd@gmail.com",
-    version="0.8.1",
+    version="0.9.0",
     packages=find_packages(),
     include_package_data=True,
     zip_safe=False,